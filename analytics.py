@@ -0,0 +1,69 @@
+"""Per-job score aggregates: score histogram, interpret_score buckets and most-missing requirements."""
+from collections import defaultdict
+
+SCORE_BIN_WIDTH = 10
+SCORE_BINS = 100 // SCORE_BIN_WIDTH
+MISSING_SECTIONS = ('skills', 'education', 'experience')
+TOP_MISSING = 10
+
+def score_bin(score):
+    """Histogram bin of a 0-100 score; 100 falls in the last bin."""
+    return min(max(int(score // SCORE_BIN_WIDTH), 0), SCORE_BINS - 1)
+
+def stat_deltas(records, sign=1):
+    """
+    {(job_id, kind, name): [count, total]} contributed by the records, negated when sign is -1.
+    kind is 'total', 'bin', 'label' or 'missing_<section>'; total only accumulates scores.
+    """
+    deltas = defaultdict(lambda: [0, 0.0])
+    for record in records:
+        job_id, score = record['job_id'], float(record['relevancy_score'])
+        keys = [(job_id, 'total', ''), (job_id, 'bin', str(score_bin(score))),
+                (job_id, 'label', record['interpret_relevancy_score'])]
+        missing = record.get('missing_data') or {}
+        for section in MISSING_SECTIONS:
+            keys.extend((job_id, f'missing_{section}', name) for name in set(missing.get(section) or []))
+        for key in keys:
+            deltas[key][0] += sign
+        deltas[(job_id, 'total', '')][1] += sign * score
+    return deltas
+
+def stats_from_counts(job_id, counts, top=TOP_MISSING):
+    """Build the analytics payload from {(kind, name): (count, total)} rows of one job."""
+    histogram = [0] * SCORE_BINS
+    missing = {section: [] for section in MISSING_SECTIONS}
+    for (kind, name), (value, _) in counts.items():
+        if value <= 0:
+            continue
+        if kind == 'bin':
+            histogram[int(name)] += value
+        elif kind.startswith('missing_'):
+            missing[kind[len('missing_'):]].append({'name': name, 'count': value})
+    for section, items in missing.items():
+        items.sort(key=lambda item: (-item['count'], item['name']))
+        del items[top:]
+    stats = {'job_id': job_id}
+    stats.update(summary_from_counts(counts))
+    stats['score_histogram'] = [
+        {'min': index * SCORE_BIN_WIDTH, 'max': (index + 1) * SCORE_BIN_WIDTH, 'count': value}
+        for index, value in enumerate(histogram)
+    ]
+    stats['most_missing'] = missing
+    return stats
+
+def summary_from_counts(counts):
+    """Score count, mean and interpret_score buckets from {(kind, name): (count, total)} rows of one job."""
+    count, total = counts.get(('total', ''), (0, 0.0))
+    return {
+        'count': count,
+        'mean_score': round(total / count, 2) if count else None,
+        'interpret_buckets': {name: value for (kind, name), (value, _) in counts.items() if kind == 'label' and value > 0}
+    }
+
+def record_counts(records):
+    """{(kind, name): (count, total)} of one job, computed by scanning its score records."""
+    return {(kind, name): tuple(value) for (_, kind, name), value in stat_deltas(records).items()}
+
+def stats_from_records(job_id, records, top=TOP_MISSING):
+    """The analytics payload computed by scanning a job's score records."""
+    return stats_from_counts(job_id, record_counts(records), top)
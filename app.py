@@ -1,58 +1,140 @@
+import cProfile
 import os
+import threading
+import time
 import uuid
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, g, Response
 from werkzeug.utils import secure_filename
-from pymongo import MongoClient
 from dotenv import load_dotenv
-import os
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 
-# MongoDB configuration
-app.config["MONGO_URI"] = "mongodb+srv://<username>:<password>@cluster.yn4nj.mongodb.net/resume_analyzer?retryWrites=true&w=majority"
-client = MongoClient(app.config["MONGO_URI"])
-db = client.get_database()
-
-# Collections
-job_collection = db.job_descriptions
-resume_collection = db.resumes
-scores_collection = db.relevancy_scores
-
-from extractor import (
-    extract_text,
-    convert_to_html,
-    extract_skills_from_html,
-    extract_education_from_html,
-    extract_experience_from_html,
-    allowed_file
-)
-from utils import load_job_descriptions_csv, save_job_description_csv, save_job_description_mongodb, load_job_descriptions_mongodb, save_relevancy_score_csv, save_relevancy_score_mongodb, load_relevancy_scores_csv, load_relevancy_scores_mongodb
-from models import calculate_relevancy, interpret_score  # Placeholder for now
+from extractor import allowed_file, get_nlp, nlp_loaded, skill_matchers
+from models import interpret_score, get_job_embedding, rank_resumes, get_bert_model, bert_model_loaded
+from ingest import ingest_resumes
+from rescore import rescore_job
+from pipeline import analyze_resume_file, score_resume_file
+from resume_cache import resume_cache
+from job_index import job_index
+from storage import repository, seed_from_csv
+from job_registry import job_registry
+from tasks import scoring_queue, QueueFull
+from metrics import METRICS_ENABLED, PROFILE_DIR, timed, request_seconds, render_metrics, rss_bytes, pss_bytes, component_rss
+from model_client import get_model_client, ModelServerError
 
 app.config['UPLOAD_FOLDER'] = 'data/resumes'
 app.config['JOB_DESCRIPTIONS_FILE'] = 'data/job_descriptions.csv'
 app.config['RELEVANCY_SCORES_FILE'] = 'data/relevancy_scores.csv'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
 app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'docx', 'txt'}
+app.config['INGEST_WORKERS'] = None  # text extraction processes, None = all cores
+app.config['INGEST_BATCH_SIZE'] = 32
+app.config['INGEST_N_PROCESS'] = 1
 
 # Create necessary directories
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs('data', exist_ok=True)
 
-# Initialize job descriptions (load from CSV)
-job_descriptions = load_job_descriptions_mongodb()
-
-# --- Utility Functions ---
-def get_missing_requirements(extracted_data, required_data):
-    missing = {}
-    for key in required_data:
-        extracted_set = set(extracted_data.get(key, []))
-        required_set = set(required_data[key])
-        missing[key] = list(required_set - extracted_set)
-    return missing
+def seed_database():
+    """Fill an empty local database from the bundled CSV files"""
+    if seed_from_csv(repository, app.config['JOB_DESCRIPTIONS_FILE'], app.config['RELEVANCY_SCORES_FILE']):
+        job_registry.reload()
+
+# gunicorn.conf.py turns this off so a preloading master never writes the database;
+# its post_fork hook seeds from each worker instead
+if os.getenv('SEED_ON_IMPORT', '1') == '1':
+    seed_database()
+
+# Job descriptions are served from job_registry, which every worker keeps in sync
+
+# --- Model loading ---
+# Models load lazily; PRELOAD_MODELS=1 warms them up at import (use with gunicorn's
+# preload_app so forked workers share the loaded models copy-on-write), and
+# PRELOAD_MODELS=background warms them up in a thread while requests are served.
+# Otherwise the first /ready probe starts that background warm-up.
+# With MODEL_SERVER_SOCKET set they are never loaded here: model_server.py holds them.
+job_index_built = False
+job_index_version = None
+job_index_jobs = {}  # the jobs the index currently holds
+job_index_lock = threading.Lock()
+warm_up_error = None
+warm_up_thread = None
+warm_up_lock = threading.Lock()
+
+def ensure_job_index():
+    """Index every job's embedding for resume -> job search, catching up with the job registry"""
+    global job_index_built, job_index_version, job_index_jobs
+    job_registry.all()  # picks up jobs other workers added, bumping job_registry.version
+    if job_index_version == job_registry.version:
+        return
+    with job_index_lock:
+        version = job_registry.version
+        jobs = job_registry.all()
+        if job_index_version == version:
+            return
+        if not job_index_built or any(job_id not in jobs for job_id in job_index_jobs):
+            job_index.rebuild({job_id: get_job_embedding(job) for job_id, job in jobs.items()})
+        else:
+            # Only new or edited jobs need (re-)adding
+            for job_id, job in jobs.items():
+                if job_index_jobs.get(job_id) != job:
+                    job_index.add(job_id, get_job_embedding(job))
+        job_index_jobs = jobs
+        job_index_version = version
+        job_index_built = True
+
+def warm_up():
+    """Load both models (or check the model server is up) and build everything derived from them"""
+    global warm_up_error
+    try:
+        if get_model_client() is not None:
+            get_model_client().stats()
+        else:
+            get_nlp()
+            skill_matchers.get()
+            get_bert_model()
+        ensure_job_index()
+    except Exception as e:
+        warm_up_error = str(e)
+        raise
+    warm_up_error = None
+
+def start_warm_up():
+    """Run warm_up in a background thread, unless one is running or it already succeeded"""
+    global warm_up_thread
+    with warm_up_lock:
+        if job_index_built or (warm_up_thread is not None and warm_up_thread.is_alive()):
+            return
+        # A failed warm-up is retried by the next call
+        warm_up_thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+        warm_up_thread.start()
+
+if os.getenv('PRELOAD_MODELS') == '1':
+    warm_up()
+elif os.getenv('PRELOAD_MODELS') == 'background':
+    start_warm_up()
+
+# --- Instrumentation ---
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if PROFILE_DIR and request.args.get('profile') == '1':
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def record_request_time(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILE_DIR, f"{request.endpoint}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.prof"))
+    if METRICS_ENABLED and request.endpoint:
+        request_seconds.observe(request.endpoint, time.perf_counter() - g.request_start)
+    return response
 
 # --- Routes ---
 @app.route('/')
@@ -61,11 +143,11 @@ def index():
 
 @app.route('/recruiter')
 def recruiter_dashboard():
-    return render_template('recruiter/dashboard.html', job_descriptions=job_descriptions)
+    return render_template('recruiter/dashboard.html', job_descriptions=job_registry.all())
 
 @app.route('/applicant')
 def applicant_dashboard():
-    return render_template('applicant/dashboard.html', job_descriptions=job_descriptions)
+    return render_template('applicant/dashboard.html', job_descriptions=job_registry.all())
 
 @app.route('/recruiter/add_job', methods=['GET', 'POST'])
 def add_job():
@@ -85,9 +167,8 @@ def add_job():
             'required_education': required_education,
             'required_experience': required_experience
         }
-        save_job_description_csv(app.config['JOB_DESCRIPTIONS_FILE'], job_data)
-        save_job_description_mongodb(job_data)
-        job_descriptions[job_id] = job_data  # Update in-memory data
+        job_registry.add(job_data)  # Saves the job and notifies the other workers
+        get_job_embedding(job_data)  # Encode once now instead of on every upload
 
         return redirect(url_for('recruiter_dashboard'))
     return render_template('recruiter/add_job.html')
@@ -104,62 +185,16 @@ def upload_resume(job_id):
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-
-        try:
-            html_content = convert_to_html(filepath)
+        with timed('file_save'):
+            file.save(filepath)
 
-            extracted_data = {
-                'skills': extract_skills_from_html(html_content),
-                'education': extract_education_from_html(html_content),
-                'experience': extract_experience_from_html(html_content)
-            }
-
-            # Load job description
-            job_description = job_descriptions.get(job_id)
-            if not job_description:
-                return jsonify({'error': 'Job description not found'}), 404
-
-            required_data = {
-                'skills': job_description['required_skills'],
-                'education': job_description['required_education'],
-                'experience': job_description['required_experience']
-            }
+        # Load job description
+        job_description = job_registry.get(job_id)
+        if not job_description:
+            return jsonify({'error': 'Job description not found'}), 404
 
-            # Calculate Relevancy Score
-            relevancy_score = calculate_relevancy(extracted_data, job_description)     # Using Calculate Relevancy
-            interpret_relevancy_score = interpret_score(relevancy_score)
-            missing_requirements = get_missing_requirements(extracted_data, required_data)
-            resume_id = str(uuid.uuid4())
-            
-            # Save to CSV
-            save_relevancy_score_csv(
-                app.config['RELEVANCY_SCORES_FILE'],
-                resume_id,
-                job_id,
-                relevancy_score,
-                interpret_relevancy_score,
-                extracted_data,
-                missing_requirements
-            )
-
-            # Save to MongoDB
-            save_relevancy_score_mongodb(
-                resume_id,
-                job_id,
-                relevancy_score,
-                interpret_relevancy_score,
-                extracted_data,
-                missing_requirements
-            )
-
-            return jsonify({
-                'resume_id': resume_id,
-                'relevancy_score': relevancy_score,
-                'interpret_relevancy_score': interpret_relevancy_score,
-                'extracted': extracted_data,
-                'missing': missing_requirements
-            })
+        try:
+            return jsonify(score_resume_file(filepath, job_description))
 
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -169,44 +204,159 @@ def upload_resume(job_id):
 
     return jsonify({'error': 'Invalid file type'}), 400
 
-@app.route('/recruiter/view_resumes/<job_id>')
-def view_resumes(job_id):
-    # Load relevancy scores from CSV
-    relevancy_scores = load_relevancy_scores_csv(app.config['RELEVANCY_SCORES_FILE'])
+@app.route('/applicant/upload_resume_async/<job_id>', methods=['POST'])
+def upload_resume_async(job_id):
+    """Accept a resume and score it on the background queue; poll the returned status URL"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
 
-    # Load job descriptions
-    job_descriptions = load_job_descriptions_mongodb()
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
 
-    job_description = job_descriptions.get(job_id)
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Invalid file type'}), 400
 
+    job_description = job_registry.get(job_id)
     if not job_description:
-        return jsonify({'error': 'Job not found'}), 404
-    
-    job_name = job_description.get('job_title', 'Unnamed Position')
+        return jsonify({'error': 'Job description not found'}), 404
 
-    required_data = {
-        'skills': job_description['required_skills'],
-        'education': job_description['required_education'],
-        'experience': job_description['required_experience']
-    }
+    # Unique name so a queued file can't be overwritten by a later upload with the same name
+    filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    with timed('file_save'):
+        file.save(filepath)
 
-    job_scores = {}
+    try:
+        task_id = scoring_queue.submit(score_resume_file, filepath, job_description)
+    except QueueFull:
+        os.remove(filepath)
+        response = jsonify({'error': 'Scoring queue is full, try again shortly'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    return jsonify({
+        'task_id': task_id,
+        'status': 'queued',
+        'status_url': url_for('task_status', task_id=task_id)
+    }), 202
+
+@app.route('/tasks/<task_id>')
+def task_status(task_id):
+    task = scoring_queue.status(task_id)
+    if task is None:
+        return jsonify({'error': 'Task not found'}), 404
+    return jsonify(task)
+
+@app.route('/recruiter/bulk_upload/<job_id>', methods=['POST'])
+def bulk_upload_resumes(job_id):
+    job_description = job_registry.get(job_id)
+    if not job_description:
+        return jsonify({'error': 'Job description not found'}), 404
+
+    files = [file for file in request.files.getlist('files') if file.filename]
+    if not files:
+        return jsonify({'error': 'No files uploaded'}), 400
 
-    for resume_id, score_data in relevancy_scores.items():
-        if score_data['job_id'] != job_id:
+    filepaths, rejected = [], []
+    for file in files:
+        if not allowed_file(file.filename):
+            rejected.append({'filename': file.filename, 'error': 'Invalid file type'})
             continue
+        # Prefix with a uuid so resumes sharing a name within a batch don't overwrite each other
+        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        with timed('file_save'):
+            file.save(filepath)
+        filepaths.append(filepath)
+
+    if not filepaths:
+        # Every file was rejected; report that without loading any model
+        return jsonify({'job_id': job_id, 'scored': 0, 'results': [], 'failed': rejected})
+
+    try:
+        results, failures = ingest_resumes(
+            filepaths,
+            job_description,
+            max_workers=app.config['INGEST_WORKERS'],
+            batch_size=app.config['INGEST_BATCH_SIZE'],
+            n_process=app.config['INGEST_N_PROCESS']
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({
+        'job_id': job_id,
+        'scored': len(results),
+        'results': results,
+        'failed': rejected + failures
+    })
+
+@app.route('/applicant/match_jobs', methods=['POST'])
+def match_jobs():
+    """Embed one resume and return the jobs it matches best"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Invalid file type'}), 400
 
-        extracted_data = score_data.get('extracted_data', {
-            'skills': [],
-            'education': [],
-            'experience': []
+    top_n = request.args.get('top_n', default=10, type=int)
+    if top_n < 1:
+        return jsonify({'error': 'top_n must be at least 1'}), 400
+
+    # Unique name so concurrent uploads sharing a file name don't overwrite each other
+    filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    with timed('file_save'):
+        file.save(filepath)
+
+    try:
+        extracted_data, resume_embedding, cache_hit, truncated = analyze_resume_file(filepath)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    ensure_job_index()
+    matches = []
+    for job_id, similarity in job_index.search(resume_embedding, top_n=top_n):
+        job = job_registry.get(job_id)
+        if not job:
+            continue
+        relevancy_score = round(similarity * 100, 2)
+        matches.append({
+            'job_id': job_id,
+            'job_title': job.get('job_title', 'Unnamed Position'),
+            'relevancy_score': relevancy_score,
+            'interpret_relevancy_score': interpret_score(relevancy_score)
         })
 
-        missing = get_missing_requirements(extracted_data, required_data)
+    return jsonify({'matches': matches, 'extracted': extracted_data, 'cached': cache_hit, 'truncated': truncated})
+
+@app.route('/recruiter/view_resumes/<job_id>')
+def view_resumes(job_id):
+    # Served from the in-memory registry instead of querying the backend per page view
+    job_description = job_registry.get(job_id)
 
-        job_scores[resume_id] = {
-            'relevancy_score': score_data.get('relevancy_score', 0),
-            'interpret_relevancy_score': score_data.get('interpret_relevancy_score', ''),
+    if not job_description:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    job_name = job_description.get('job_title', 'Unnamed Position')
+
+    page = max(request.args.get('page', default=1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', default=50, type=int), 1), 500)
+    total = repository.count_scores(job_id)
+
+    # One indexed, score-ordered page; missing requirements were computed when each resume was scored
+    job_scores = {}
+    for score_data in repository.scores_page(job_id, page=page, per_page=per_page):
+        missing = score_data['missing_data']
+        job_scores[score_data['resume_id']] = {
+            'relevancy_score': score_data['relevancy_score'],
+            'interpret_relevancy_score': score_data['interpret_relevancy_score'],
             'missing_skills': missing.get('skills', []),
             'missing_education': missing.get('education', []),
             'missing_experience': missing.get('experience', [])
@@ -216,9 +366,132 @@ def view_resumes(job_id):
         'recruiter/view_resumes.html',
         job_id=job_id,
         job_name=job_name,
-        relevancy_scores=job_scores
+        relevancy_scores=job_scores,
+        page=page,
+        per_page=per_page,
+        total=total,
+        page_count=max((total + per_page - 1) // per_page, 1)
     )
 
+@app.route('/recruiter/rescore/<job_id>', methods=['POST'])
+def rescore_job_scores(job_id):
+    """Bring a job's stored scores up to date with its current requirements on the background queue"""
+    job_description = job_registry.get(job_id)
+    if not job_description:
+        return jsonify({'error': 'Job not found'}), 404
+
+    try:
+        task_id = scoring_queue.submit(rescore_job, job_description, force=request.args.get('force') == '1')
+    except QueueFull:
+        response = jsonify({'error': 'Scoring queue is full, try again shortly'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    return jsonify({
+        'task_id': task_id,
+        'status': 'queued',
+        'status_url': url_for('task_status', task_id=task_id)
+    }), 202
+
+@app.route('/recruiter/analytics')
+def job_analytics_summary():
+    """Score count, mean and interpret_score buckets for every job"""
+    summaries = repository.job_summaries()
+    return jsonify({
+        'jobs': [
+            dict(summaries.get(job_id, {'count': 0, 'mean_score': None, 'interpret_buckets': {}}),
+                 job_id=job_id, job_title=job.get('job_title', 'Unnamed Position'))
+            for job_id, job in job_registry.all().items()
+        ]
+    })
+
+@app.route('/recruiter/analytics/<job_id>')
+def job_analytics(job_id):
+    """Score distribution, interpret_score buckets and the most commonly missing requirements of one job"""
+    job_description = job_registry.get(job_id)
+    if not job_description:
+        return jsonify({'error': 'Job not found'}), 404
+
+    top = min(max(request.args.get('top', default=10, type=int), 1), 100)
+    stats = repository.job_stats(job_id, top=top)
+    stats['job_title'] = job_description.get('job_title', 'Unnamed Position')
+    return jsonify(stats)
+
+@app.route('/recruiter/rank/<job_id>')
+def rank_job_resumes(job_id):
+    """Re-rank stored resume embeddings against the job's current requirements"""
+    job_description = job_registry.get(job_id)
+    if not job_description:
+        return jsonify({'error': 'Job not found'}), 404
+
+    top_k = request.args.get('top_k', default=50, type=int)
+    if top_k < 1:
+        return jsonify({'error': 'top_k must be at least 1'}), 400
+    # scope=all ranks every stored resume, not only those uploaded for this job
+    scope_job_id = None if request.args.get('scope') == 'all' else job_id
+    ranked = rank_resumes(job_description, job_id=scope_job_id, top_k=top_k)
+
+    return jsonify({
+        'job_id': job_id,
+        'results': [
+            {
+                'resume_id': resume_id,
+                'job_id': applied_job_id,
+                'relevancy_score': relevancy_score,
+                'interpret_relevancy_score': interpret_score(relevancy_score)
+            }
+            for resume_id, applied_job_id, relevancy_score in ranked
+        ]
+    })
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once the models are loaded, 503 while they are still loading"""
+    # Without PRELOAD_MODELS nothing else would load them before traffic arrives
+    start_warm_up()
+    error = warm_up_error
+    client = get_model_client()
+    if client is not None:
+        # The models live in the model server; ready once it answers
+        try:
+            client.stats()
+            server_up = True
+        except ModelServerError as e:
+            server_up, error = False, str(e)
+        components = {'model_server': server_up, 'job_index': job_index_built}
+    else:
+        components = {
+            'spacy': nlp_loaded(),
+            'encoder': bert_model_loaded(),
+            'job_index': job_index_built
+        }
+    body = {'ready': all(components.values()), 'components': components}
+    if error:
+        body['error'] = error
+    return jsonify(body), 200 if body['ready'] else 503
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(resume_cache.stats())
+
+@app.route('/memory')
+def memory():
+    """Resident memory of this worker and of the model server, with the share each loaded model added"""
+    body = {'worker': {'pid': os.getpid(), 'rss_bytes': rss_bytes(), 'pss_bytes': pss_bytes(),
+                       'components': dict(component_rss)}}
+    client = get_model_client()
+    if client is not None:
+        try:
+            body['model_server'] = client.stats()
+        except ModelServerError as e:
+            body['model_server'] = {'error': str(e)}
+    return jsonify(body)
+
+@app.route('/metrics')
+def metrics():
+    """Per-stage and per-endpoint timing histograms (METRICS_ENABLED=1), for Prometheus to scrape"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 # --- Main ---
 if __name__ == '__main__':
     app.run(debug=True)
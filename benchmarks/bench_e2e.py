@@ -0,0 +1,204 @@
+"""End-to-end benchmark over a synthetic resume corpus, reported as JSON for comparing commits.
+
+Measures p50/p99 latency and throughput of text extraction (per format), the spaCy extractors,
+calculate_relevancy, the view_resumes page and bulk ingestion. Everything runs offline in a
+scratch directory against a local SQLite repository; a stage whose dependencies are missing
+is reported with an "error" instead of stopping the run.
+
+Usage: python benchmarks/bench_e2e.py [--resumes N] [--jobs N] [--scores N] [--repeat N] [--output results.json]
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_resumes, generate_jobs, writable_formats
+
+def summarize(timings_ms, items=None):
+    """p50/p99/mean latency of the samples, and items per second over their total time."""
+    if not timings_ms:
+        return {'n': 0}
+    ordered = sorted(timings_ms)
+    total_seconds = sum(ordered) / 1000
+    return {
+        'n': len(ordered),
+        'p50_ms': round(statistics.median(ordered), 3),
+        'p99_ms': round(ordered[max(math.ceil(0.99 * len(ordered)) - 1, 0)], 3),
+        'mean_ms': round(statistics.mean(ordered), 3),
+        'throughput_per_s': round((items or len(ordered)) / total_seconds, 2) if total_seconds else None
+    }
+
+def time_each(func, inputs, repeat=1):
+    timings = []
+    for _ in range(repeat):
+        for value in inputs:
+            start = time.perf_counter()
+            func(value)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def bench_extract_text(corpus, repeat):
+    from extractor import extract_text
+    results = {}
+    for file_format in sorted({entry['format'] for entry in corpus}):
+        paths = [entry['path'] for entry in corpus if entry['format'] == file_format]
+        try:
+            results[file_format] = summarize(time_each(extract_text, paths, repeat))
+        except Exception as e:
+            results[file_format] = {'error': f'{type(e).__name__}: {e}'}
+    return results
+
+def bench_extractors(corpus, repeat):
+    from extractor import ResumeAnalysis
+    texts = {}
+    for entry in corpus:
+        if entry['format'] == corpus[0]['format']:
+            texts.setdefault(entry['size'], []).append(entry['text'])
+    ResumeAnalysis(texts[next(iter(texts))][0]).extract()  # load the model outside the timings
+    return {size: summarize(time_each(lambda text: ResumeAnalysis(text).extract(), size_texts, repeat))
+            for size, size_texts in texts.items()}
+
+def bench_relevancy(corpus, jobs, repeat):
+    from models import calculate_relevancy
+    # Ground-truth extracted data from the generator, so this stage doesn't depend on spaCy
+    extracted = [entry['extracted'] for entry in corpus if entry['format'] == corpus[0]['format']]
+    calculate_relevancy(extracted[0], jobs[0])  # load the model and cache the job embeddings
+    for job in jobs:
+        calculate_relevancy(extracted[0], job)
+    pairs = [(data, jobs[index % len(jobs)]) for index, data in enumerate(extracted)]
+    return summarize(time_each(lambda pair: calculate_relevancy(*pair), pairs, repeat))
+
+def seed_scores(repository, jobs, count, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for index in range(count):
+        score = round(rng.uniform(20, 95), 2)
+        records.append({
+            'resume_id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'job_id': jobs[index % len(jobs)]['job_id'],
+            'relevancy_score': score,
+            'interpret_relevancy_score': 'Moderate Match',
+            'extracted_data': {'skills': ['Python', 'SQL'], 'education': ['Master of Science'], 'experience': ['Data Analyst']},
+            'missing_data': {'skills': ['Docker'], 'education': [], 'experience': ['2+ years in ML']}
+        })
+    repository.save_scores(records)
+
+def bench_view_resumes(jobs, repeat):
+    import app
+    client = app.app.test_client()
+    urls = [f"/recruiter/view_resumes/{job['job_id']}?page=1&per_page=50" for job in jobs]
+
+    def get(url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}")
+
+    get(urls[0])
+    return summarize(time_each(get, urls, repeat))
+
+def bench_ingest(corpus, jobs, batch_size, workers):
+    from ingest import ingest_resumes
+    from storage import repository
+    paths = [entry['path'] for entry in corpus]
+    batches = [paths[offset:offset + batch_size] for offset in range(0, len(paths), batch_size)]
+    timings = []
+    for index, batch in enumerate(batches):
+        start = time.perf_counter()
+        results, failures = ingest_resumes(batch, jobs[index % len(jobs)], max_workers=workers,
+                                           batch_size=batch_size, cache=None, storage=repository)
+        timings.append((time.perf_counter() - start) * 1000)
+        if failures:
+            raise RuntimeError(f"{len(failures)} files failed, first: {failures[0]['error']}")
+    result = summarize(timings, items=len(paths))
+    result['batch_size'] = batch_size
+    return result
+
+def run_stage(results, name, func, *args):
+    print(f"running {name} ...", file=sys.stderr)
+    try:
+        results[name] = func(*args)
+    except Exception as e:
+        results[name] = {'error': f'{type(e).__name__}: {e}'}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=30, help='resumes per format')
+    parser.add_argument('--formats', default='pdf,docx,txt')
+    parser.add_argument('--jobs', type=int, default=10)
+    parser.add_argument('--scores', type=int, default=20000, help='score records seeded for view_resumes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=32, help='files per bulk ingestion call')
+    parser.add_argument('--workers', type=int, default=None, help='text extraction processes for ingestion')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON here as well as to stdout')
+    args = parser.parse_args()
+
+    # Formats whose writer needs a missing package are left out rather than failing the run
+    formats, skipped_formats = writable_formats(args.formats.split(','))
+    for file_format, reason in skipped_formats.items():
+        print(f"warning: skipping {file_format} resumes: {reason}", file=sys.stderr)
+    if not formats:
+        parser.error('none of the requested formats can be written here')
+
+    # Work in a scratch directory: the app's relative data/ paths, the SQLite database and the
+    # embedding stores all land there, and no Mongo or network access is needed
+    output_path = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix='bench_e2e_')
+    os.environ.update(STORAGE_BACKENDS='sqlite', SQLITE_PATH=os.path.join(workdir, 'data', 'bench.db'),
+                      PRELOAD_MODELS='0', HF_HUB_OFFLINE='1', TRANSFORMERS_OFFLINE='1')
+    os.chdir(workdir)
+
+    try:
+        corpus = generate_resumes(os.path.join(workdir, 'resumes'), args.resumes, formats, args.seed)
+        jobs = generate_jobs(args.jobs, args.seed)
+
+        from storage import repository
+        repository.save_jobs(jobs)
+        seed_scores(repository, jobs, args.scores, args.seed)
+
+        results = {
+            'commit': git_commit(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'params': vars(args),
+            'corpus': {'files': len(corpus), 'bytes': sum(os.path.getsize(entry['path']) for entry in corpus),
+                       'skipped_formats': skipped_formats}
+        }
+        run_stage(results, 'extract_text', bench_extract_text, corpus, args.repeat)
+        run_stage(results, 'extractors', bench_extractors, corpus, args.repeat)
+        run_stage(results, 'calculate_relevancy', bench_relevancy, corpus, jobs, args.repeat)
+        run_stage(results, 'view_resumes', bench_view_resumes, jobs, args.repeat)
+        run_stage(results, 'bulk_ingest', bench_ingest, corpus, jobs, args.batch_size, args.workers)
+
+        output = json.dumps(results, indent=2)
+        print(output)
+        if output_path:
+            with open(output_path, 'w') as f:
+                f.write(output + '\n')
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
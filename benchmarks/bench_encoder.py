@@ -0,0 +1,112 @@
+"""Compare the sentence encoder backends: encode latency, peak memory and score parity with torch.
+
+Scores every bundled resume against every bundled job on each backend. The run fails
+(exit status 1) when a backend's scores differ from the torch backend's by more than --tolerance points.
+
+Usage: python benchmarks/bench_encoder.py [--backends torch,onnx,onnx-int8] [--threads N] [--repeat N] [--tolerance 2.0]
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from models import cos_sim, load_encoder, resume_to_text, job_to_text, ENCODER_BATCH_SIZE
+from utils import load_job_descriptions_csv, load_relevancy_scores_csv
+
+JOB_DESCRIPTIONS_FILE = os.path.join(ROOT, 'data', 'job_descriptions.csv')
+RELEVANCY_SCORES_FILE = os.path.join(ROOT, 'data', 'relevancy_scores.csv')
+
+def load_texts():
+    jobs = [job_to_text(job) for job in load_job_descriptions_csv(JOB_DESCRIPTIONS_FILE).values()]
+    resumes = [resume_to_text(score['extracted_data'])
+               for score in load_relevancy_scores_csv(RELEVANCY_SCORES_FILE).values()]
+    return jobs, resumes
+
+def run_backend(backend, threads, repeat, batch_size):
+    """Measure one backend in this process and return its results."""
+    start = time.perf_counter()
+    encoder = load_encoder(backend, threads)
+    load_seconds = time.perf_counter() - start
+    jobs, resumes = load_texts()
+    encoder.encode(resumes[:1])  # first call pays one-off initialisation
+
+    single_ms = []
+    for _ in range(repeat):
+        for text in resumes:
+            start = time.perf_counter()
+            encoder.encode(text)
+            single_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        resume_embeddings = encoder.encode(resumes, batch_size=batch_size)
+    batch_seconds = (time.perf_counter() - start) / repeat
+
+    scores = (cos_sim(resume_embeddings, encoder.encode(jobs, batch_size=batch_size)) * 100).round(2)
+    return {
+        'backend': backend,
+        'load_s': round(load_seconds, 2),
+        'encode_p50_ms': round(statistics.median(single_ms), 2),
+        'batch_texts_per_s': round(len(resumes) / batch_seconds, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'scores': scores.tolist()
+    }
+
+def measure(backend, args):
+    """Run one backend in a fresh interpreter so its load time and memory are its own."""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', backend, '--threads', str(args.threads),
+         '--repeat', str(args.repeat), '--batch-size', str(args.batch_size)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        stderr = completed.stderr.strip().splitlines()
+        return {'backend': backend, 'error': stderr[-1] if stderr else f'exit status {completed.returncode}'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', default='torch,onnx,onnx-int8')
+    parser.add_argument('--threads', type=int, default=0, help='intra-op threads (default: runtime default)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=ENCODER_BATCH_SIZE)
+    parser.add_argument('--tolerance', type=float, default=2.0, help='allowed score difference from torch, in points')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.threads, args.repeat, args.batch_size)))
+        return 0
+
+    backends = args.backends.split(',')
+    if 'torch' not in backends:
+        backends.insert(0, 'torch')
+    results = [measure(backend, args) for backend in backends]
+    reference = next(result for result in results if result['backend'] == 'torch')
+
+    failed = False
+    print(f"{'backend':10s} {'load s':>7s} {'p50 ms':>8s} {'texts/s':>8s} {'rss MB':>8s} {'max diff':>9s}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['backend']:10s} failed: {result['error']}")
+            failed = True
+            continue
+        max_diff = 0.0
+        if 'scores' in reference:
+            max_diff = max(abs(a - b) for row, ref_row in zip(result['scores'], reference['scores'])
+                           for a, b in zip(row, ref_row))
+        ok = max_diff <= args.tolerance
+        failed = failed or not ok
+        print(f"{result['backend']:10s} {result['load_s']:7.2f} {result['encode_p50_ms']:8.2f} "
+              f"{result['batch_texts_per_s']:8.1f} {result['peak_rss_mb']:8.1f} {max_diff:9.2f}{'' if ok else '  OVER TOLERANCE'}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Compare per-resume extraction latency: one spaCy parse per extractor vs a shared parse.
+
+Usage: python benchmarks/bench_extractors.py [resume files ...] [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractor import (
+    extract_text,
+    extract_skills_from_html,
+    extract_education_from_html,
+    extract_experience_from_html,
+    ResumeAnalysis,
+    text_to_html
+)
+
+SAMPLE_RESUME = """Jane Doe
+Data Scientist | jane.doe@example.com
+Summary
+Data scientist with 4 years of experience building machine learning models in Python and SQL.
+Experience
+Senior Data Scientist, Acme Analytics, 2021 - Present
+Built predictive modeling pipelines with TensorFlow, PyTorch and Scikit-learn deployed on AWS with Docker.
+Led a team of five engineers delivering natural language processing services for Google Cloud customers.
+Data Analyst, Globex Corporation, 2019 - 2021
+Developed data visualization dashboards with Pandas, NumPy and Matplotlib for the finance department.
+Education
+Master of Science in Computer Science, Stanford University
+Bachelor of Engineering in Information Technology, University of Mumbai
+Skills
+Python, SQL, Machine Learning, Deep Learning, Statistics, Git, Kubernetes, Agile, Communication
+"""
+
+
+def separate_parses(text):
+    # The original path: wrap the text in HTML and let every extractor parse it
+    html_content = text_to_html(text)
+    return {
+        'skills': extract_skills_from_html(html_content),
+        'education': extract_education_from_html(html_content),
+        'experience': extract_experience_from_html(html_content)
+    }
+
+
+def shared_parse(text):
+    return ResumeAnalysis(text).extract()
+
+
+def time_it(func, documents, repeat):
+    timings = []
+    for _ in range(repeat):
+        for text in documents:
+            start = time.perf_counter()
+            func(text)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='*', help='resume files (pdf/docx/txt); a built-in sample is used if omitted')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    documents = [extract_text(path) for path in args.files] or [SAMPLE_RESUME * 3]
+
+    # Warm up the pipeline so model loading does not skew the first sample
+    shared_parse(documents[0])
+
+    results = {}
+    for name, func in (('separate_parses', separate_parses), ('shared_parse', shared_parse)):
+        timings = time_it(func, documents, args.repeat)
+        results[name] = statistics.median(timings)
+        print(f"{name:16s} median {results[name]:8.1f} ms  mean {statistics.mean(timings):8.1f} ms  n={len(timings)}")
+
+    print(f"speedup          {results['separate_parses'] / results['shared_parse']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Measure process startup: import time of the app modules and time until the models are ready.
+
+Usage: python benchmarks/bench_startup.py [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPETS = {
+    'import extractor': 'import extractor',
+    'import models': 'import models',
+    'import app': 'import app',
+    'import app + warm_up': 'import app; app.warm_up()',
+}
+
+def time_snippet(snippet):
+    """Wall time of a fresh interpreter running the snippet, measured inside the child."""
+    code = (
+        'import time; _start = time.perf_counter()\n'
+        f'{snippet}\n'
+        'print(time.perf_counter() - _start)'
+    )
+    env = dict(os.environ, PRELOAD_MODELS='0')
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1]) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for name, snippet in SNIPPETS.items():
+        try:
+            timings = [time_snippet(snippet) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            print(f"{name:22s} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{name:22s} median {statistics.median(timings):9.1f} ms  min {min(timings):9.1f} ms")
+
+if __name__ == '__main__':
+    main()
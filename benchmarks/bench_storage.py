@@ -0,0 +1,76 @@
+"""Offline write/read benchmark for the local storage backends.
+
+Usage: python benchmarks/bench_storage.py [--records N] [--jobs N] [--batch-size N] [--threads N] [--backends sqlite,csv]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteRepository, CSVRepository
+
+def make_records(count, job_ids):
+    return [
+        {
+            'resume_id': str(uuid.uuid4()),
+            'job_id': job_ids[i % len(job_ids)],
+            'relevancy_score': round((i * 7919) % 10000 / 100, 2),
+            'interpret_relevancy_score': 'Moderate Match',
+            'extracted_data': {'skills': ['Python', 'SQL'], 'education': ['Master of Science'], 'experience': ['Data Analyst']},
+            'missing_data': {'skills': ['Docker'], 'education': [], 'experience': ['2+ years in ML']}
+        }
+        for i in range(count)
+    ]
+
+def make_backend(name, directory):
+    if name == 'sqlite':
+        return SQLiteRepository(os.path.join(directory, 'bench.db'))
+    if name == 'csv':
+        return CSVRepository(os.path.join(directory, 'jobs.csv'), os.path.join(directory, 'scores.csv'))
+    raise ValueError(f"{name} is not a local backend")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--jobs', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=1, help='concurrent writers, like simultaneous uploads')
+    parser.add_argument('--backends', default='sqlite,csv')
+    args = parser.parse_args()
+
+    job_ids = [str(uuid.uuid4()) for _ in range(args.jobs)]
+    records = make_records(args.records, job_ids)
+
+    for name in args.backends.split(','):
+        with tempfile.TemporaryDirectory() as directory:
+            backend = make_backend(name, directory)
+
+            batches = [records[offset:offset + args.batch_size] for offset in range(0, len(records), args.batch_size)]
+
+            def write(thread_batches):
+                for batch in thread_batches:
+                    backend.save_scores(batch)
+
+            threads = [threading.Thread(target=write, args=(batches[index::args.threads],)) for index in range(args.threads)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            write_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for job_id in job_ids:
+                backend.count_scores(job_id)
+                backend.scores_page(job_id, page=1, per_page=50)
+            page_ms = (time.perf_counter() - start) * 1000 / len(job_ids)
+
+            print(f"{name:7s} write {len(records) / write_seconds:10.0f} records/s   page view {page_ms:8.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Deterministic synthetic resumes (PDF, DOCX and TXT) and job descriptions for the benchmarks.
+
+Usage: python benchmarks/corpus.py <output dir> [--count N] [--formats pdf,docx,txt] [--seed N]
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from extractor import SKILLS_LIST, DEGREE_TYPES, FIELDS_OF_STUDY
+from utils import load_job_descriptions_csv
+
+JOB_DESCRIPTIONS_FILE = os.path.join(ROOT, 'data', 'job_descriptions.csv')
+
+# Experience entries per resume; "large" runs to several PDF pages
+SIZES = {'small': 2, 'medium': 6, 'large': 24}
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Jane', 'Omar', 'Mei', 'Lucas', 'Sofia', 'Kwame', 'Ana', 'Ravi']
+LAST_NAMES = ['Shah', 'Patel', 'Doe', 'Haddad', 'Chen', 'Silva', 'Rossi', 'Mensah', 'Kowalski', 'Iyer']
+TITLES = ['Data Scientist', 'Machine Learning Engineer', 'Software Engineer', 'Data Analyst',
+          'Backend Developer', 'Research Engineer', 'Cloud Engineer', 'Product Analyst']
+COMPANIES = ['Acme Analytics', 'Globex Corporation', 'Initech', 'Umbrella Labs', 'Stark Industries',
+             'Wayne Enterprises', 'Hooli', 'Vandelay Imports']
+UNIVERSITIES = ['Stanford University', 'University of Mumbai', 'IIT Delhi', 'University of Toronto',
+                'Gujarat Technological University', 'ETH Zurich']
+VERBS = ['Built', 'Designed', 'Led', 'Optimized', 'Deployed', 'Maintained', 'Automated', 'Migrated']
+OBJECTS = ['data pipelines', 'recommendation models', 'REST APIs', 'reporting dashboards',
+           'forecasting services', 'feature stores', 'search infrastructure', 'ETL jobs']
+
+def make_resume(rng, size='medium'):
+    """A resume as text lines, plus the skills, education and experience it was built from."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS_LIST, min(len(SKILLS_LIST), 6 + 2 * SIZES[size]))
+    title = rng.choice(TITLES)
+    lines = [name, f"{title} | {name.lower().replace(' ', '.')}@example.com", '', 'Summary',
+             f"{title} with {rng.randint(1, 12)} years of experience in {', '.join(skills[:3])}.", '', 'Experience']
+
+    experience = []
+    for _ in range(SIZES[size]):
+        role = rng.choice(TITLES)
+        experience.append(role)
+        start = rng.randint(2005, 2022)
+        lines.append(f"{role}, {rng.choice(COMPANIES)}, {start} - {start + rng.randint(1, 4)}")
+        for _ in range(4):
+            lines.append(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(skills)} and {rng.choice(skills)}.")
+
+    education = []
+    lines += ['', 'Education']
+    for _ in range(rng.randint(1, 2)):
+        degree = f"{rng.choice(DEGREE_TYPES)} in {rng.choice(FIELDS_OF_STUDY)}"
+        education.append(degree)
+        lines.append(f"{degree}, {rng.choice(UNIVERSITIES)}")
+
+    lines += ['', 'Skills', ', '.join(skills)]
+    return lines, {'skills': skills, 'education': education, 'experience': experience}
+
+def _pdf_string(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1', 'replace')
+
+def write_pdf(path, lines, lines_per_page=55):
+    """A minimal text-only PDF (Helvetica, one text line per resume line), written by hand."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = [None, None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_refs = []
+    for page_lines in pages:
+        stream = b'BT /F1 10 Tf 13 TL 50 760 Td\n' + b''.join(b'(' + _pdf_string(line) + b') Tj T*\n' for line in page_lines) + b'ET'
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects)
+        )
+        page_refs.append(b'%d 0 R' % len(objects))
+    objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objects[1] = b'<< /Type /Pages /Kids [' + b' '.join(page_refs) + b'] /Count %d >>' % len(page_refs)
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+def write_docx(path, lines):
+    import docx
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+def write_txt(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+WRITERS = {'pdf': write_pdf, 'docx': write_docx, 'txt': write_txt}
+WRITER_MODULES = {'docx': 'docx'}  # optional packages a writer imports
+
+def writable_formats(formats):
+    """Split formats into those this environment can write and {format: reason} for the rest."""
+    usable, skipped = [], {}
+    for file_format in formats:
+        module = WRITER_MODULES.get(file_format)
+        if file_format not in WRITERS:
+            skipped[file_format] = 'unknown format'
+        elif module and importlib.util.find_spec(module) is None:
+            skipped[file_format] = f"{module} is not installed"
+        else:
+            usable.append(file_format)
+    return usable, skipped
+
+def generate_resumes(directory, count, formats=('pdf', 'docx', 'txt'), seed=0):
+    """
+    Write count resumes per format, cycling through the sizes.
+    Returns [{'path', 'format', 'size', 'text', 'extracted'}, ...].
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    sizes = list(SIZES)
+    corpus = []
+    for index in range(count):
+        size = sizes[index % len(sizes)]
+        lines, extracted = make_resume(rng, size)
+        for file_format in formats:
+            path = os.path.join(directory, f"resume_{index:04d}_{size}.{file_format}")
+            WRITERS[file_format](path, lines)
+            corpus.append({'path': path, 'format': file_format, 'size': size,
+                           'text': '\n'.join(lines), 'extracted': extracted})
+    return corpus
+
+def generate_jobs(count, seed=0, jobs_file=JOB_DESCRIPTIONS_FILE):
+    """Job descriptions shaped like the bundled ones: their titles and requirements, reshuffled."""
+    rng = random.Random(seed)
+    templates = list(load_job_descriptions_csv(jobs_file).values())
+    jobs = []
+    for index in range(count):
+        template = templates[index % len(templates)]
+        skills = rng.sample(template['required_skills'], max(1, len(template['required_skills']) * 2 // 3))
+        skills += rng.sample([skill for skill in SKILLS_LIST if skill not in skills], 2)
+        jobs.append({
+            'job_id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'job_title': f"{template['job_title']} {index}",
+            'job_description': template['job_description'],
+            'required_skills': skills,
+            'required_education': list(template['required_education']),
+            'required_experience': list(template['required_experience'])
+        })
+    return jobs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory')
+    parser.add_argument('--count', type=int, default=30, help='resumes per format')
+    parser.add_argument('--formats', default='pdf,docx,txt')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    formats, skipped = writable_formats(args.formats.split(','))
+    for file_format, reason in skipped.items():
+        print(f"skipping {file_format}: {reason}", file=sys.stderr)
+    corpus = generate_resumes(args.directory, args.count, formats, args.seed)
+    print(f"wrote {len(corpus)} resumes to {args.directory}")
+
+if __name__ == '__main__':
+    main()
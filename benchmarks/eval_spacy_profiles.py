@@ -0,0 +1,197 @@
+"""Compare spaCy pipeline profiles: extraction accuracy on labelled resumes, latency and memory.
+
+Each profile runs in a fresh interpreter, so its load time and RSS are its own. Accuracy is
+micro-averaged precision/recall/F1 per section against the labels, plus the agreement (mean
+Jaccard) of each profile's output with the reference profile's (the first one listed). With
+--min-f1 and/or --min-agreement the fastest profile meeting the bar is reported, and the run
+exits 1 when none does.
+
+Labelled samples come from --samples (JSON lines: {"text", "skills", "education", "experience"})
+or, by default, from the synthetic corpus generator, whose resumes carry their own labels.
+
+Usage: python benchmarks/eval_spacy_profiles.py [--profiles lg,md,sm] [--samples file.jsonl] [--count N]
+                                               [--repeat N] [--min-f1 0.8] [--min-agreement 0.95] [--output results.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from term_index import normalize_term
+
+SECTIONS = ('skills', 'education', 'experience')
+
+def generate_samples(count, seed=0):
+    """Labelled samples from the benchmark corpus generator, cycling through the resume sizes."""
+    from corpus import SIZES, make_resume
+    rng = random.Random(seed)
+    sizes = list(SIZES)
+    samples = []
+    for index in range(count):
+        lines, labels = make_resume(rng, sizes[index % len(sizes)])
+        samples.append(dict(labels, text='\n'.join(lines)))
+    return samples
+
+def load_samples(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def run_profile(profile, samples_path, repeat):
+    """Extract every sample with the SPACY_PROFILE pipeline in this process; return outputs, timings and memory."""
+    from extractor import ResumeAnalysis, analyze_resumes, get_nlp
+    from metrics import component_rss, rss_bytes
+
+    texts = [sample['text'] for sample in load_samples(samples_path)]
+    start = time.perf_counter()
+    nlp = get_nlp()
+    load_seconds = time.perf_counter() - start
+    outputs = [ResumeAnalysis(text).extract() for text in texts]  # also warms the matcher
+
+    single_ms = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            ResumeAnalysis(text).extract()
+            single_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for analysis in analyze_resumes(texts):
+        analysis.extract()
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'profile': profile,
+        'pipeline': nlp.pipe_names,
+        'load_s': round(load_seconds, 2),
+        'p50_ms': round(statistics.median(single_ms), 2),
+        'p99_ms': round(sorted(single_ms)[max(int(len(single_ms) * 0.99) - 1, 0)], 2),
+        'batch_docs_per_s': round(len(texts) / batch_seconds, 1),
+        'model_rss_mb': round(component_rss.get('spacy', 0) / 2**20, 1),
+        'rss_mb': round(rss_bytes() / 2**20, 1),
+        'outputs': outputs
+    }
+
+def _matches(a, b):
+    # Equal, or one contains the other on word boundaries ("Data Scientist" in "Senior Data Scientist")
+    return a == b or f' {a} ' in f' {b} ' or f' {b} ' in f' {a} '
+
+def accuracy(outputs, samples):
+    """{section: {precision, recall, f1}} micro-averaged over the samples, plus the mean F1."""
+    result = {}
+    for section in SECTIONS:
+        found = matched_found = labelled = matched_labels = 0
+        for output, sample in zip(outputs, samples):
+            predicted = [normalize_term(item) for item in output.get(section, [])]
+            labels = [normalize_term(item) for item in sample.get(section, [])]
+            found += len(predicted)
+            labelled += len(labels)
+            matched_found += sum(any(_matches(item, label) for label in labels) for item in predicted)
+            matched_labels += sum(any(_matches(label, item) for item in predicted) for label in labels)
+        precision = matched_found / found if found else 0.0
+        recall = matched_labels / labelled if labelled else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        result[section] = {'precision': round(precision, 3), 'recall': round(recall, 3), 'f1': round(f1, 3)}
+    result['mean_f1'] = round(statistics.mean(result[section]['f1'] for section in SECTIONS), 3)
+    return result
+
+def agreement(outputs, reference_outputs):
+    """Mean Jaccard similarity of each section's items with the reference profile's."""
+    scores = []
+    for output, reference in zip(outputs, reference_outputs):
+        for section in SECTIONS:
+            a = {normalize_term(item) for item in output.get(section, [])}
+            b = {normalize_term(item) for item in reference.get(section, [])}
+            scores.append(len(a & b) / len(a | b) if a | b else 1.0)
+    return round(statistics.mean(scores), 3) if scores else None
+
+def measure(profile, samples_path, repeat):
+    """Run one profile in a fresh interpreter, with the models loaded in-process."""
+    env = {key: value for key, value in os.environ.items() if key != 'MODEL_SERVER_SOCKET'}
+    env['SPACY_PROFILE'] = profile
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', profile, '--samples', samples_path, '--repeat', str(repeat)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        stderr = completed.stderr.strip().splitlines()
+        return {'profile': profile, 'error': stderr[-1] if stderr else f'exit status {completed.returncode}'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', default='lg,md,sm', help='comma-separated; the first is the agreement reference')
+    parser.add_argument('--samples', help='labelled samples as JSON lines (default: generated)')
+    parser.add_argument('--count', type=int, default=60, help='generated samples when --samples is not given')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-f1', type=float, default=None, help='quality bar on the mean F1 against the labels')
+    parser.add_argument('--min-agreement', type=float, default=None, help='quality bar on agreement with the reference')
+    parser.add_argument('--output', help='write the JSON results here')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_profile(args.worker, args.samples, args.repeat)))
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix='eval_spacy_') as workdir:
+        samples_path = args.samples
+        if samples_path:
+            samples = load_samples(samples_path)
+        else:
+            samples = generate_samples(args.count, args.seed)
+            samples_path = os.path.join(workdir, 'samples.jsonl')
+            with open(samples_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(sample) + '\n' for sample in samples)
+        results = [measure(profile, os.path.abspath(samples_path), args.repeat) for profile in args.profiles.split(',')]
+
+    outputs = {result['profile']: result.pop('outputs') for result in results if 'outputs' in result}
+    reference_outputs = outputs.get(results[0]['profile'])
+    for result in results:
+        if result['profile'] in outputs:
+            result['accuracy'] = accuracy(outputs[result['profile']], samples)
+            result['agreement'] = agreement(outputs[result['profile']], reference_outputs) if reference_outputs else None
+
+    print(f"{'profile':8s} {'load s':>7s} {'p50 ms':>8s} {'p99 ms':>8s} {'docs/s':>8s} {'model MB':>9s} "
+          f"{'rss MB':>8s} {'skills':>7s} {'edu':>6s} {'exp':>6s} {'mean F1':>8s} {'agree':>6s}")
+    passing = []
+    for result in results:
+        if 'error' in result:
+            print(f"{result['profile']:8s} failed: {result['error']}")
+            continue
+        f1 = result['accuracy']
+        agree = result['agreement']
+        print(f"{result['profile']:8s} {result['load_s']:7.2f} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} "
+              f"{result['batch_docs_per_s']:8.1f} {result['model_rss_mb']:9.1f} {result['rss_mb']:8.1f} "
+              f"{f1['skills']['f1']:7.3f} {f1['education']['f1']:6.3f} {f1['experience']['f1']:6.3f} "
+              f"{f1['mean_f1']:8.3f} {agree if agree is not None else float('nan'):6.3f}")
+        if ((args.min_f1 is None or f1['mean_f1'] >= args.min_f1)
+                and (args.min_agreement is None or (agree is not None and agree >= args.min_agreement))):
+            passing.append(result)
+
+    status = 0
+    if args.min_f1 is not None or args.min_agreement is not None:
+        if passing:
+            best = min(passing, key=lambda result: result['p50_ms'])
+            print(f"fastest profile meeting the bar: {best['profile']} (SPACY_PROFILE={best['profile']})")
+        else:
+            print('no profile meets the quality bar')
+            status = 1
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'samples': len(samples), 'results': results}, f, indent=2)
+            f.write('\n')
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Appending CSV writers that are safe to share between threads and processes."""
+import atexit
+import csv
+import fcntl
+import io
+import os
+import threading
+import time
+
+CSV_FSYNC_INTERVAL = float(os.getenv('CSV_FSYNC_INTERVAL', '1.0'))  # seconds between fsyncs; 0 syncs every commit, -1 never
+
+class CSVWriter:
+    """
+    Appends rows to one CSV file with group commit: rows submitted while another thread
+    is writing are queued, and the next writer appends all of them with one write.
+    Each append holds an exclusive flock on the file, so rows from different processes
+    never interleave, and the header is only written when the file is still empty.
+
+    Commits fsync at most once per fsync_interval. Rows a commit leaves unsynced are
+    fsynced by a timer once the interval has passed, or by flush() (run at exit).
+    """
+
+    def __init__(self, filename, fieldnames, fsync_interval=CSV_FSYNC_INTERVAL):
+        self.filename = filename
+        self.fieldnames = list(fieldnames)
+        self.fsync_interval = fsync_interval
+        self.commits = 0
+        self._pending = []  # [text, done event, error] per queued write
+        self._pending_lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._last_fsync = 0.0
+        self._dirty = False  # rows written since the last fsync
+        self._flush_timer = None
+        self._header = self._format(None)
+
+    def _format(self, rows):
+        buffer = io.StringIO(newline='')
+        writer = csv.DictWriter(buffer, fieldnames=self.fieldnames)
+        if rows is None:
+            writer.writeheader()
+        else:
+            writer.writerows(rows)
+        return buffer.getvalue()
+
+    def write_rows(self, rows):
+        """Append rows (dicts keyed by fieldnames); returns once they are written."""
+        text = self._format(rows)
+        if not text:
+            return
+        entry = [text, threading.Event(), None]
+        with self._pending_lock:
+            self._pending.append(entry)
+
+        with self._commit_lock:
+            # A writer that held the lock before us may already have committed our rows
+            if not entry[1].is_set():
+                with self._pending_lock:
+                    batch, self._pending = self._pending, []
+                try:
+                    self._append(''.join(text for text, _, _ in batch))
+                except Exception as e:
+                    for queued in batch:
+                        queued[2] = e
+                finally:
+                    for queued in batch:
+                        queued[1].set()
+        if entry[2] is not None:
+            raise entry[2]
+
+    def write_row(self, row):
+        self.write_rows([row])
+
+    def _open_locked(self):
+        """An O_APPEND fd on the file, holding its exclusive flock."""
+        while True:
+            try:
+                fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+                continue
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # A rewrite may have replaced the file while we waited for the lock
+            try:
+                if os.stat(self.filename).st_ino == os.fstat(fd).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def _append(self, text):
+        fd = self._open_locked()
+        try:
+            if os.fstat(fd).st_size == 0:
+                text = self._header + text
+            data = memoryview(text.encode('utf-8'))
+            while data:
+                data = data[os.write(fd, data):]
+            self.commits += 1
+
+            if self.fsync_interval >= 0:
+                now = time.monotonic()
+                if now - self._last_fsync >= self.fsync_interval:
+                    os.fsync(fd)
+                    self._last_fsync = now
+                    self._dirty = False
+                else:
+                    self._dirty = True
+                    self._schedule_flush(self._last_fsync + self.fsync_interval - now)
+        finally:
+            os.close(fd)  # also releases the flock
+
+    def _schedule_flush(self, delay):
+        # Called under _commit_lock; a timer inherited across a fork is no longer alive
+        if self._flush_timer is None or not self._flush_timer.is_alive():
+            self._flush_timer = threading.Timer(delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """fsync rows that commits have written since the last fsync."""
+        with self._commit_lock:
+            if not self._dirty:
+                return
+            try:
+                fd = os.open(self.filename, os.O_RDONLY)
+            except FileNotFoundError:
+                self._dirty = False
+                return
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._last_fsync = time.monotonic()
+            self._dirty = False
+
+    def replace_rows(self, rows, key):
+        """
+        Rewrite the file with rows (dicts keyed by fieldnames) in place of the existing rows
+        sharing their key field, appending rows with a new key. Older duplicate rows of a key
+        are dropped. The new file is written aside and swapped in with os.replace under the
+        flock, so readers see either the old or the new file and no append is lost.
+        """
+        rows = {row[key]: row for row in rows}
+        if not rows:
+            return
+        with self._commit_lock:
+            fd = self._open_locked()
+            try:
+                with open(self.filename, 'r', encoding='utf-8', newline='') as f:
+                    # A key's last row wins, at the position of its first
+                    existing = {}
+                    for row in csv.DictReader(f):
+                        existing[row[key]] = row
+                existing.update(rows)
+
+                tmp_path = f"{self.filename}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=self.fieldnames, restval='', extrasaction='ignore')
+                    writer.writeheader()
+                    writer.writerows(existing.values())
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.filename)
+                self.commits += 1
+            finally:
+                os.close(fd)  # writers blocked on the old file's flock reopen the new one
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_csv_writer(filename, fieldnames):
+    """The process-wide writer for a CSV file, so every caller shares its lock and queue."""
+    key = os.path.abspath(filename)
+    writer = _writers.get(key)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None:
+                writer = _writers[key] = CSVWriter(filename, fieldnames)
+    return writer
+
+@atexit.register
+def _flush_writers():
+    for writer in list(_writers.values()):
+        try:
+            writer.flush()
+        except OSError:
+            pass
@@ -0,0 +1,220 @@
+import fcntl
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+EMBEDDINGS_DIR = 'data/embeddings'
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+ID_BYTES = 36  # str(uuid.uuid4())
+COMPACT_INTERVAL = float(os.getenv('EMBEDDING_COMPACT_INTERVAL', '300'))  # seconds; 0 disables background compaction
+COMPACT_MIN_SUPERSEDED = 0.2  # compact once this share of the records has been superseded
+
+def record_dtype(dim=EMBEDDING_DIM, id_fields=('resume_id', 'job_id')):
+    """One fixed-size record: the ids and a unit-length float32 vector."""
+    return np.dtype([(field, f'S{ID_BYTES}') for field in id_fields] + [('vector', '<f4', (dim,))])
+
+class EmbeddingStore:
+    """
+    Append-only file of fixed-size embedding records, memory-mapped for reads.
+    Every record is written with a single O_APPEND write, so the ids and the vector
+    can't be interleaved with another process's append.
+
+    Records are keyed by their first id field; appending a key again supersedes its older
+    record. Superseded records are skipped by reads and dropped when the file is compacted,
+    which happens in a background thread once enough of them pile up.
+    """
+
+    def __init__(self, path, dim=EMBEDDING_DIM, id_fields=('resume_id', 'job_id'), group_field='job_id',
+                 compact_interval=COMPACT_INTERVAL):
+        self.path = path
+        self.dim = dim
+        self.id_fields = id_fields
+        self.key_field = id_fields[0]
+        self.group_field = group_field
+        self.compact_interval = compact_interval
+        self.dtype = record_dtype(dim, id_fields)
+        self._lock = threading.Lock()
+        self._records = None
+        self._key_rows = {}  # key (bytes) -> row of its latest record
+        self._group_rows = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._superseded = 0
+        self._loaded = None  # (inode, size) of the file as last mapped
+        self._compactor_pid = None
+
+    @contextmanager
+    def _file_lock(self, operation):
+        # Appends share the lock; compaction holds it exclusively while it swaps the file
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            os.close(fd)
+
+    def append(self, *entry):
+        """Append one (*ids, embedding) entry, e.g. append(resume_id, job_id, embedding)."""
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        """Append (*ids, embedding) entries with one write."""
+        if not entries:
+            return
+        records = np.zeros(len(entries), dtype=self.dtype)
+        for record, (*ids, embedding) in zip(records, entries):
+            if any(len(value) > ID_BYTES for value in ids):
+                raise ValueError(f"ids longer than {ID_BYTES} characters can't be stored")
+            vector = np.asarray(embedding, dtype=np.float32).reshape(self.dim)
+            norm = np.linalg.norm(vector)
+            for field, value in zip(self.id_fields, ids):
+                record[field] = value.encode('ascii')
+            record['vector'] = vector / norm if norm else vector
+
+        with self._file_lock(fcntl.LOCK_SH):
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, records.tobytes())
+            finally:
+                os.close(fd)
+        self._start_compactor()
+
+    def _refresh(self):
+        """Re-map the file if other writers appended records (or compacted it) since the last read."""
+        try:
+            stat = os.stat(self.path)
+            loaded = (stat.st_ino, stat.st_size)
+        except FileNotFoundError:
+            loaded = (None, 0)
+        if loaded == self._loaded:
+            return
+        count = loaded[1] // self.dtype.itemsize
+        if count:
+            records = np.memmap(self.path, dtype=self.dtype, mode='r', shape=(count,))
+        else:
+            records = np.zeros(0, dtype=self.dtype)
+
+        # Only index the rows appended since the last refresh, unless the file was replaced
+        same_file = self._loaded is not None and self._loaded[0] == loaded[0]
+        start = len(self._records) if same_file and count >= len(self._records) else 0
+        if start == 0:
+            self._key_rows, self._group_rows, self._superseded = {}, {}, 0
+        live = np.ones(count, dtype=bool)
+        live[:start] = self._live[:start]
+        for row, key in enumerate(records[self.key_field][start:].tolist(), start):
+            previous = self._key_rows.get(key)
+            if previous is not None:
+                live[previous] = False
+                self._superseded += 1
+            self._key_rows[key] = row
+        if self.group_field:
+            for row, group in enumerate(records[self.group_field][start:].tolist(), start):
+                self._group_rows.setdefault(group.decode('ascii'), []).append(row)
+        self._records = records
+        self._live = live
+        self._loaded = loaded
+
+    def snapshot(self):
+        """All records as of now, superseded ones included, as a read-only memmap."""
+        with self._lock:
+            self._refresh()
+            return self._records
+
+    def live_rows(self):
+        """(records, row indices) of the current record for every key; rows is None when that is all of them."""
+        with self._lock:
+            self._refresh()
+            return self._records, (np.flatnonzero(self._live) if self._superseded else None)
+
+    def rows_for_job(self, job_id):
+        """(records, row indices) for one group's current records, e.g. one job's resumes."""
+        with self._lock:
+            self._refresh()
+            rows = np.array(self._group_rows.get(job_id, []), dtype=np.int64)
+            if self._superseded:
+                rows = rows[self._live[rows]]
+            return self._records, rows
+
+    def get(self, key):
+        """The current record for a key (a copy, with str ids), or None."""
+        with self._lock:
+            self._refresh()
+            row = self._key_rows.get(key.encode('ascii'))
+            if row is None:
+                return None
+            record = self._records[row]
+            entry = {field: record[field].decode('ascii') for field in self.id_fields}
+            entry['vector'] = np.array(record['vector'])
+            return entry
+
+    def get_vectors(self, keys):
+        """{key: vector (a copy)} for the keys that have a current record."""
+        with self._lock:
+            self._refresh()
+            found = {}
+            for key in keys:
+                row = self._key_rows.get(key.encode('ascii'))
+                if row is not None:
+                    found[key] = np.array(self._records[row]['vector'])
+            return found
+
+    def compact(self):
+        """Rewrite the file without superseded records. Returns how many records were dropped."""
+        with self._file_lock(fcntl.LOCK_EX), self._lock:
+            self._refresh()
+            if not self._superseded:
+                return 0
+            kept = np.asarray(self._records[self._live])
+            dropped = len(self._records) - len(kept)
+            tmp_path = self.path + '.compact'
+            with open(tmp_path, 'wb') as f:
+                f.write(kept.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._refresh()
+            return dropped
+
+    def _start_compactor(self):
+        # Started on first append, and again in a forked child, whose parent's threads are gone
+        if not self.compact_interval or self._compactor_pid == os.getpid():
+            return
+        with self._lock:
+            if self._compactor_pid == os.getpid():
+                return
+            self._compactor_pid = os.getpid()
+        threading.Thread(target=self._compact_periodically, name='embedding-compactor', daemon=True).start()
+
+    def _compact_periodically(self):
+        while True:
+            time.sleep(self.compact_interval)
+            try:
+                with self._lock:
+                    self._refresh()
+                    superseded_share = self._superseded / max(len(self._records), 1)
+                if superseded_share >= COMPACT_MIN_SUPERSEDED:
+                    self.compact()
+            except OSError:
+                pass  # try again next interval
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._records) - self._superseded
+
+def top_k_rows(scores, top_k=None):
+    """Indices of the top_k highest scores, best first."""
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    if top_k is None or top_k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    top = np.argpartition(-scores, top_k)[:top_k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+# The resume store is per encoder backend; see models.resume_embeddings
+job_embeddings = EmbeddingStore(
+    os.path.join(EMBEDDINGS_DIR, 'jobs.emb'), id_fields=('job_id', 'content_hash'), group_field=None
+)
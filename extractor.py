@@ -1,15 +1,72 @@
-import re
+import os
 import html
-from pdfminer.high_level import extract_text as pdf_extract_text
-from bs4 import BeautifulSoup
-import docx
-import spacy
-from spacy.matcher import DependencyMatcher
-from spacy.matcher import PhraseMatcher
+import threading
+import time
 
+from metrics import timed, measure_rss
+from model_client import get_model_client
+from patterns import NON_SKILL_RE, WHITESPACE_RE, ARTIFACTS_RE, build_degree_regex
 
-# Load the large spaCy model
-nlp = spacy.load("en_core_web_lg")
+
+# spaCy pipeline profiles. The extractors read doc.ents (ner), doc.noun_chunks (parser, with
+# tagger and attribute_ruler for POS) and tokens (PhraseMatcher), so the lemmatizer never runs.
+# "exclude"d components are not loaded at all, "disable"d ones are loaded but skipped, and
+# "drop_vectors" frees the static word vectors of a pipeline whose tok2vec doesn't read them.
+# benchmarks/eval_spacy_profiles.py compares the profiles' accuracy, latency and memory.
+SPACY_PROFILES = {
+    'lg': {'model': 'en_core_web_lg', 'exclude': ['lemmatizer']},
+    'md': {'model': 'en_core_web_md', 'exclude': ['lemmatizer']},
+    'sm': {'model': 'en_core_web_sm', 'exclude': ['lemmatizer']},
+    'lg-full': {'model': 'en_core_web_lg'}  # every component, as loaded before profiles existed
+}
+SPACY_PROFILE = os.getenv('SPACY_PROFILE', 'lg')
+
+# Bump whenever a change alters what the extractors return, so cached analyses are redone
+EXTRACTOR_VERSION = 1
+
+# The spaCy pipeline is loaded on first use (or by warm_up) rather than at import
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def _uses_static_vectors(config):
+    if isinstance(config, dict):
+        if config.get('include_static_vectors') or 'StaticVectors' in str(config.get('@architectures', '')):
+            return True
+        return any(_uses_static_vectors(value) for value in config.values())
+    return False
+
+def load_spacy_pipeline(profile=SPACY_PROFILE):
+    """Load the pipeline for a profile name from SPACY_PROFILES, or for a profile dict"""
+    if isinstance(profile, str):
+        if profile not in SPACY_PROFILES:
+            raise ValueError(f"Unknown spaCy profile {profile!r}; choose from {sorted(SPACY_PROFILES)}")
+        profile = SPACY_PROFILES[profile]
+    import spacy
+    nlp = spacy.load(profile['model'], exclude=profile.get('exclude', []), disable=profile.get('disable', []))
+    if profile.get('drop_vectors'):
+        if _uses_static_vectors(nlp.config):
+            raise ValueError(f"{profile['model']} uses its static vectors as tok2vec features; they can't be dropped")
+        nlp.vocab.reset_vectors(width=0)
+    return nlp
+
+def get_nlp():
+    """Return the shared spaCy pipeline, loading it on first use"""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                with measure_rss('spacy'):
+                    _nlp = load_spacy_pipeline()
+    return _nlp
+
+def nlp_loaded():
+    return _nlp is not None
+
+def __getattr__(name):
+    # Keeps `from extractor import nlp` / `extractor.nlp` working without an import-time load
+    if name == 'nlp':
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Constants for skills, education, and non-skill words
 SKILLS_LIST = [
@@ -51,6 +108,8 @@ NON_SKILLS = [
     'org', 'net', 'edu', 'year', 'month', 'day', 'week', 'quarter', 'semester'
 ]
 
+NON_SKILLS_SET = frozenset(non_skill.lower() for non_skill in NON_SKILLS)
+
 DEGREE_TYPES = [
     'Bachelor', 'BSc', 'B.Sc.', 'BS', 'B.S.', 'BA', 'B.A.', 'B.E.', 'BBA', 'B.B.A.',
     'Master', 'MSc', 'M.Sc.', 'MS', 'M.S.', 'MA', 'M.A.', 'MBA', 'M.B.A.', 'M.E.', 'MEng',
@@ -62,6 +121,8 @@ DEGREE_TYPES = [
     'Doctor of Philosophy'
 ]
 
+DEGREE_RE = build_degree_regex(DEGREE_TYPES)
+
 FIELDS_OF_STUDY = [
     'Computer Science', 'Information Technology', 'IT', 'Engineering', 'Business', 
     'Economics', 'Mathematics', 'Statistics', 'Physics', 'Chemistry', 'Biology',
@@ -77,18 +138,81 @@ FIELDS_OF_STUDY = [
     'Chemical Engineering', 'Software Engineering', 'Data Science'
 ]
 
+# Limits that keep one upload from using unbounded memory or CPU during text extraction
+MAX_PDF_PAGES = int(os.getenv('MAX_PDF_PAGES', '20'))
+MAX_TEXT_CHARS = int(os.getenv('MAX_TEXT_CHARS', '200000'))
+EXTRACTION_TIME_BUDGET = float(os.getenv('EXTRACTION_TIME_BUDGET', '15'))  # seconds per document
+
 # Helper functions
+def iter_text_from_pdf(file_path, max_pages=None):
+    """Yield the text of each PDF page as pdfminer lays it out, up to max_pages (None for all)"""
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    for page_layout in extract_pages(file_path, maxpages=max_pages or 0):
+        yield ''.join(element.get_text() for element in page_layout if isinstance(element, LTTextContainer))
+
+def iter_text_from_docx(file_path):
+    """Yield the text of each DOCX paragraph"""
+    import docx
+    doc = docx.Document(file_path)
+    for paragraph in doc.paragraphs:
+        yield paragraph.text + "\n"
+
+def iter_text_from_txt(file_path, chunk_size=64 * 1024):
+    """Yield a TXT file in chunks"""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            yield chunk
+
+def iter_text(file_path, max_pages=None):
+    """Yield a document's text incrementally based on file type"""
+    file_extension = file_path.rsplit('.', 1)[1].lower()
+    if file_extension == 'pdf':
+        return iter_text_from_pdf(file_path, max_pages=max_pages)
+    elif file_extension == 'docx':
+        return iter_text_from_docx(file_path)
+    elif file_extension == 'txt':
+        return iter_text_from_txt(file_path)
+    return iter(())
+
+def extract_text_limited(file_path, max_pages=MAX_PDF_PAGES, max_chars=MAX_TEXT_CHARS, time_budget=EXTRACTION_TIME_BUDGET):
+    """
+    Extract text page by page, stopping after max_pages PDF pages, at max_chars characters
+    or once time_budget seconds have been spent. Returns (text, truncated_by), where
+    truncated_by names the limit that left some of the document's text out ('pages',
+    'chars' or 'time') and is None when the whole document was read.
+    """
+    deadline = time.monotonic() + time_budget
+    parts, length, truncated_by = [], 0, None
+    # One page past the cap is read, so only a PDF that really has more pages counts as truncated
+    paged = file_path.rsplit('.', 1)[1].lower() == 'pdf'
+    chunks = iter_text(file_path, max_pages=max_pages + 1)
+    try:
+        for index, chunk in enumerate(chunks):
+            if paged and index == max_pages:
+                truncated_by = 'pages'
+                break
+            if time.monotonic() > deadline:
+                truncated_by = 'time'
+                break
+            if length + len(chunk) > max_chars:
+                parts.append(chunk[:max_chars - length])
+                truncated_by = 'chars'
+                break
+            parts.append(chunk)
+            length += len(chunk)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    return ''.join(parts), truncated_by
+
 def extract_text_from_pdf(file_path):
-    """Extract plain text from PDF"""
-    return pdf_extract_text(file_path)
+    """Extract plain text from every page of a PDF; extract_text applies the limits"""
+    return ''.join(iter_text_from_pdf(file_path))
 
 def extract_text_from_docx(file_path):
     """Extract text from DOCX file"""
-    doc = docx.Document(file_path)
-    text = ""
-    for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
-    return text
+    return ''.join(iter_text_from_docx(file_path))
 
 def extract_text_from_txt(file_path):
     """Extract text from TXT file"""
@@ -96,22 +220,18 @@ def extract_text_from_txt(file_path):
         return f.read()
 
 def extract_text(file_path):
-    """Extract text based on file type"""
-    file_extension = file_path.rsplit('.', 1)[1].lower()
-    if file_extension == 'pdf':
-        return extract_text_from_pdf(file_path)
-    elif file_extension == 'docx':
-        return extract_text_from_docx(file_path)
-    elif file_extension == 'txt':
-        return extract_text_from_txt(file_path)
-    return ""
+    """Extract text based on file type, within the page, size and time limits"""
+    with timed('extract_text'):
+        return extract_text_limited(file_path)[0]
 
 def convert_to_html(file_path):
     """Convert document to HTML format using a simplified approach"""
-    file_extension = file_path.rsplit('.', 1)[1].lower()
     text = extract_text(file_path)
-    
-    # Create simple HTML with paragraphs
+    with timed('convert_to_html'):
+        return text_to_html(text)
+
+def text_to_html(text):
+    """Wrap each non-empty line of plain text in a paragraph"""
     html_parts = ['<html><body>']
     for line in text.split('\n'):
         if line.strip():
@@ -134,94 +254,177 @@ def is_valid_skill(skill):
         return False
     
     # Check if it's in our non-skills list
-    if skill.lower() in [ns.lower() for ns in NON_SKILLS]:
+    skill_lower = skill.lower()
+    if skill_lower in NON_SKILLS_SET:
         return False
     
-    # Check if it's just a number, date, or common formatting
-    if re.match(r'^[\d\s\-\/\.]+$', skill):
+    # Check for numbers, dates, punctuation and other common non-skill patterns
+    if NON_SKILL_RE.match(skill_lower):
         return False
     
-    # Check if it's just punctuation or special characters
-    if re.match(r'^[^\w\s]+$', skill):
-        return False
-    
-    # Check for common non-skill patterns
-    non_skill_patterns = [
-        r'^[0-9]+(st|nd|rd|th)$',  # Ordinals like 1st, 2nd
-        r'^(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)$',  # Month abbreviations
-        r'^(www|http|https|ftp)',  # URLs
-        r'^@',  # Social media handles
-        r'^\d{1,2}/\d{1,2}/\d{2,4}$',  # Dates
-        r'^\d{1,2}:\d{2}$',  # Times
-        r'^\d+(h|hrs|hours|m|mins|minutes)$',  # Time durations
-    ]
-    
-    for pattern in non_skill_patterns:
-        if re.match(pattern, skill.lower()):
-            return False
-    
     return True
 
 def clean_resume_text(text):
     """Cleans HTML, removes excessive whitespace, and aggressive filtering"""
+    from bs4 import BeautifulSoup
     text = BeautifulSoup(text, "html.parser").get_text(separator=" ")
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    return clean_text(text)
+
+def clean_text(text):
+    """Removes excessive whitespace and artifacts from plain extracted text"""
+    # Non-ASCII and whitespace runs become single spaces; "cid:" and "[\u00a7]" artifacts are dropped
+    text = ARTIFACTS_RE.sub('', WHITESPACE_RE.sub(' ', text).strip())
+
+    # Everything is on one line now; drop it if it is too short to be a resume
+    return text if len(text.split(None, 4)) > 3 else ''
+
 
-    # Remove extra newline characters and "[\u00a7]" artifacts
-    text = re.sub(r'[\n\r\f]+', ' ', text)
-    text = re.sub(r'\[\\u00a7\]', '', text)
+# Pipeline components none of the extractors read from; skipped when parsing
+UNUSED_COMPONENTS = ['lemmatizer']
 
-    # Aggressively remove patterns with "cid:" and short lines
-    text = re.sub(r'cid:\S+', '', text)
-    text = '\n'.join(line for line in text.split('\n') if len(line.split()) > 3)
-    return text
+def parse_resume(text):
+    """Run the spaCy pipeline once with only the components the extractors need"""
+    nlp = get_nlp()
+    return nlp(text, disable=[name for name in UNUSED_COMPONENTS if name in nlp.pipe_names])
 
+class ResumeAnalysis:
+    """Parses a resume's plain text once and shares the resulting Doc with every extractor"""
 
-# Update extract_text functions to use clean_resume_text()
+    def __init__(self, text, doc=None):
+        self.text = doc.text if doc is not None else clean_text(text)
+        self._doc = doc
+        self._extracted = None  # set when the model server already extracted this resume
 
-def extract_skills_from_html(html_content):
+    @classmethod
+    def from_html(cls, html_content):
+        return cls(clean_resume_text(html_content))
+
+    @property
+    def doc(self):
+        if self._doc is None:
+            with timed('spacy_parse'):
+                self._doc = parse_resume(self.text)
+        return self._doc
+
+    def extract(self):
+        """Return the skills, education and experience found in the shared Doc"""
+        if self._extracted is not None:
+            return self._extracted
+        client = get_model_client()
+        if client is not None:
+            with timed('extract_remote'):
+                return client.extract([self.text])[0]
+        doc = self.doc
+        with timed('extract_skills'):
+            skills = extract_skills_from_html(self.text, doc=doc)
+        with timed('extract_education'):
+            education = extract_education_from_html(self.text, doc=doc)
+        with timed('extract_experience'):
+            experience = extract_experience_from_html(self.text, doc=doc)
+        return {'skills': skills, 'education': education, 'experience': experience}
+
+def analyze_resumes(texts, batch_size=16, n_process=1):
+    """Parse many plain-text resumes with nlp.pipe and return one ResumeAnalysis per document"""
+    if not texts:
+        return []  # nothing to parse, so don't load spaCy for it
+    client = get_model_client()
+    if client is not None:
+        # One request for the whole batch; the server runs it through nlp.pipe
+        analyses = [ResumeAnalysis(text) for text in texts]
+        with timed('extract_remote'):
+            extracted_list = client.extract([analysis.text for analysis in analyses])
+        for analysis, extracted in zip(analyses, extracted_list):
+            analysis._extracted = extracted
+        return analyses
+    cleaned = [clean_text(text) for text in texts]
+    nlp = get_nlp()
+    disable = [name for name in UNUSED_COMPONENTS if name in nlp.pipe_names]
+    docs = nlp.pipe(cleaned, batch_size=batch_size, n_process=n_process, disable=disable)
+    with timed('spacy_parse_batch'):
+        return [ResumeAnalysis(text, doc=doc) for text, doc in zip(cleaned, docs)]
+
+def extract_file_text(file_path):
+    """Process-pool friendly extract_text_limited: (text, truncated_by, error), reporting failures instead of raising"""
+    try:
+        with timed('extract_text'):
+            text, truncated_by = extract_text_limited(file_path)
+        return text, truncated_by, None
+    except Exception as e:
+        return None, None, str(e)
+
+class SkillMatcherRegistry:
+    """Holds one case-insensitive PhraseMatcher for SKILLS_LIST, shared by all threads
+
+    Patterns are tokenized with nlp.tokenizer only, and the matcher is rebuilt
+    only when the skill list it was built from changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry = None  # (skills tuple, matcher), swapped atomically
+
+    def get(self, skills=None):
+        skills = tuple(SKILLS_LIST if skills is None else skills)
+        entry = self._entry
+        if entry is not None and entry[0] == skills:
+            return entry[1]
+        with self._lock:
+            if self._entry is None or self._entry[0] != skills:
+                self._entry = (skills, self._build(skills))
+            return self._entry[1]
+
+    @staticmethod
+    def _build(skills):
+        from spacy.matcher import PhraseMatcher
+        nlp = get_nlp()
+        matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        # One label per skill so matches map back to the canonical spelling
+        for skill, pattern in zip(skills, nlp.tokenizer.pipe(skills)):
+            matcher.add(skill, [pattern])
+        return matcher
+
+
+skill_matchers = SkillMatcherRegistry()
+
+def extract_skills_from_html(html_content, doc=None):
     """Skill extraction using SpaCy's PhraseMatcher"""
-    doc = nlp(clean_resume_text(html_content))
-    matcher = PhraseMatcher(nlp.vocab)
-    
-    # Create patterns from SKILLS_LIST
-    patterns = [nlp(skill) for skill in SKILLS_LIST]
-    matcher.add("SKILLS", patterns)
+    if doc is None:
+        doc = get_nlp()(clean_resume_text(html_content))
+    matcher = skill_matchers.get()
     
-    # Extract matches
+    # Extract matches, reported with their SKILLS_LIST spelling
     skills = []
     for match_id, start, end in matcher(doc):
-        span = doc[start:end]
-        if span.text not in skills:
-            skills.append(span.text)
+        skill = doc.vocab.strings[match_id]
+        if skill not in skills:
+            skills.append(skill)
     
     # Additional filtering
-    return [skill for skill in skills if len(skill) > 2 and skill.lower() not in NON_SKILLS]
+    return [skill for skill in skills if len(skill) > 2 and skill.lower() not in NON_SKILLS_SET]
 
-def extract_education_from_html(html_content):
+def extract_education_from_html(html_content, doc=None):
     """Improved education extraction focusing on degree names rather than institutions using spaCy"""
-    doc = nlp(html_content)
+    if doc is None:
+        doc = get_nlp()(html_content)
     education_info = []
     
     # Extract education entities using spaCy's named entity recognition
     for ent in doc.ents:
-        if ent.label_ == "ORG" and any(degree.lower() in ent.text.lower() for degree in DEGREE_TYPES):
+        if ent.label_ == "ORG" and DEGREE_RE.search(ent.text):
             education_info.append(ent.text.strip())
     
-    # Extract education based on degree types
-    for degree_type in DEGREE_TYPES:
-        pattern = r'(?i)\b(' + re.escape(degree_type) + r'(?:\s+of\s+[A-Za-z]+)?(?:\s+in\s+[^,\.]*)?)'
-        matches = re.findall(pattern, doc.text)
-        for match in matches:
-            if match and match not in education_info:
-                education_info.append(match.strip())
+    # Extract education based on degree types, all of them in one pass
+    for match in DEGREE_RE.findall(doc.text):
+        match = match.strip()
+        if match and match not in education_info:
+            education_info.append(match)
     
     return education_info
 
-def extract_experience_from_html(html_content):
+def extract_experience_from_html(html_content, doc=None):
     """Improved experience extraction from HTML content using spaCy"""
-    doc = nlp(html_content)
+    if doc is None:
+        doc = get_nlp()(html_content)
     experience_info = []
     
     # Extract organizations as potential experience
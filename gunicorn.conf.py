@@ -0,0 +1,37 @@
+# gunicorn -c gunicorn.conf.py app:app
+#
+# The app is imported once in the master with PRELOAD_MODELS=1, so spaCy and the
+# sentence encoder are loaded before forking and every worker shares their memory
+# copy-on-write instead of loading its own copy.
+#
+# With MODEL_SERVER_SOCKET set, the workers load no models at all and send extraction
+# and encoding to model_server.py (start it first); /memory reports each process's RSS.
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault('PRELOAD_MODELS', '1')
+# Tokenizer thread pools don't survive fork; let each worker use plain threads
+os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+# One worker per core already uses every core, so each encoder runs single-threaded
+os.environ.setdefault('ENCODER_THREADS', '1')
+# Seed the database from the workers (post_fork), not from the preloading master
+os.environ.setdefault('SEED_ON_IMPORT', '0')
+
+bind = os.getenv('BIND', '127.0.0.1:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+preload_app = True
+timeout = 120
+
+def pre_fork(server, worker):
+    # Move everything allocated so far (the loaded models) out of the collector's reach,
+    # so gc passes in the workers don't touch, and therefore copy, the shared pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Each worker opens its own SQLite connections (storage keys them by pid), so seeding
+    # here never touches one the master opened while preloading
+    if os.environ['SEED_ON_IMPORT'] != '1':
+        from app import seed_database
+        seed_database()
@@ -0,0 +1,171 @@
+"""Bulk resume ingestion, shared by the bulk upload endpoint and the command line.
+
+Usage: python ingest.py <job_id> <resume files or directories ...> [--workers N] [--batch-size N] [--n-process N]
+"""
+import argparse
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from extractor import analyze_resumes, extract_file_text, allowed_file
+from models import SCORING_MODE, resume_embeddings, encode_resumes, encode_resumes_sections, relevancy_from_embeddings, interpret_score
+from resume_cache import resume_cache, resume_cache_key
+from utils import get_missing_requirements, get_required_data
+from pipeline import score_extracted
+from storage import repository, create_repository, seed_from_csv
+from metrics import timed
+
+def extract_files_text(filepaths, max_workers=None):
+    """Run pdfminer/docx text extraction for every file on a process pool; (text, truncated_by, error) per file."""
+    if max_workers == 1 or len(filepaths) <= 1:
+        return [extract_file_text(filepath) for filepath in filepaths]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        chunksize = max(1, len(filepaths) // (4 * (max_workers or os.cpu_count() or 1)))
+        return list(pool.map(extract_file_text, filepaths, chunksize=chunksize))
+
+def ingest_resumes(filepaths, job_description, max_workers=None, batch_size=32,
+                   n_process=1, cache=resume_cache, storage=repository, mode=SCORING_MODE):
+    """
+    Extract, score and store many resumes for one job.
+    Files already in the resume cache skip extraction and encoding.
+    Returns (results, failures) where each result describes one stored resume; its truncated
+    flag is set when the extraction limits cut the file's text short.
+    """
+    analyzed = {}  # filepath -> (extracted_data, resume_embedding, item_embeddings)
+    truncated = {}  # filepath -> whether the extraction limits cut its text short
+    timed_out = set()  # files cut short by the time budget, which aren't cached
+    content_hashes = {}
+    to_extract = []
+    for filepath in filepaths:
+        content_hash = resume_cache_key(filepath)
+        entry = cache.get(content_hash) if cache is not None else None
+        if entry is not None:
+            analyzed[filepath] = (entry['extracted_data'], entry['embedding'], entry['item_embeddings'])
+            truncated[filepath] = entry['truncated']
+        else:
+            content_hashes[filepath] = content_hash
+            to_extract.append(filepath)
+
+    with timed('extract_text_pool'):
+        extracted_texts = extract_files_text(to_extract, max_workers=max_workers)
+
+    parsed_files, texts, failures = [], [], []
+    for filepath, (text, truncated_by, error) in zip(to_extract, extracted_texts):
+        if error is None:
+            parsed_files.append(filepath)
+            texts.append(text)
+            truncated[filepath] = truncated_by is not None
+            if truncated_by == 'time':
+                timed_out.add(filepath)
+        else:
+            failures.append({'filename': os.path.basename(filepath), 'error': error})
+
+    analyses = analyze_resumes(texts, batch_size=batch_size, n_process=n_process)
+    extracted_data_list = [analysis.extract() for analysis in analyses]
+    if not extracted_data_list:
+        encoded = []
+    elif mode == 'sections':
+        encoded = encode_resumes_sections(extracted_data_list, batch_size=batch_size)
+    else:
+        encoded = [(embedding, None) for embedding in encode_resumes(extracted_data_list, batch_size=batch_size)]
+    for filepath, analysis, extracted_data, (resume_embedding, item_embeddings) in zip(parsed_files, analyses, extracted_data_list, encoded):
+        analyzed[filepath] = (extracted_data, resume_embedding, item_embeddings)
+        if cache is not None and filepath not in timed_out:
+            cache.put(content_hashes[filepath], analysis.text, extracted_data, resume_embedding, item_embeddings,
+                      truncated[filepath])
+
+    scored_files = [filepath for filepath in filepaths if filepath in analyzed]
+    if not scored_files:
+        return [], failures
+    if mode == 'sections':
+        scored = []
+        for filepath in scored_files:
+            extracted_data, resume_embedding, item_embeddings = analyzed[filepath]
+            scored.append(score_extracted(extracted_data, resume_embedding, job_description, item_embeddings, mode=mode))
+    else:
+        # One matrix product scores the whole batch
+        relevancy_scores = relevancy_from_embeddings(
+            [analyzed[filepath][1] for filepath in scored_files],
+            job_description
+        )
+        required_data = get_required_data(job_description)
+        scored = [
+            (relevancy_score, get_missing_requirements(analyzed[filepath][0], required_data))
+            for filepath, relevancy_score in zip(scored_files, relevancy_scores)
+        ]
+
+    records, results = [], []
+    for filepath, (relevancy_score, missing_requirements) in zip(scored_files, scored):
+        record = {
+            'resume_id': str(uuid.uuid4()),
+            'job_id': job_description['job_id'],
+            'relevancy_score': relevancy_score,
+            'interpret_relevancy_score': interpret_score(relevancy_score),
+            'extracted_data': analyzed[filepath][0],
+            'missing_data': missing_requirements
+        }
+        records.append(record)
+        results.append({
+            'filename': os.path.basename(filepath),
+            'resume_id': record['resume_id'],
+            'relevancy_score': record['relevancy_score'],
+            'interpret_relevancy_score': record['interpret_relevancy_score'],
+            'missing': record['missing_data'],
+            'truncated': truncated[filepath]
+        })
+
+    resume_embeddings.append_many([
+        (record['resume_id'], record['job_id'], analyzed[filepath][1])
+        for filepath, record in zip(scored_files, records)
+    ])
+    storage.save_scores(records)
+
+    return results, failures
+
+def collect_resume_files(paths):
+    """Expand directories into the supported resume files they contain."""
+    filepaths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if allowed_file(name):
+                    filepaths.append(os.path.join(path, name))
+        elif allowed_file(path):
+            filepaths.append(path)
+    return filepaths
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a batch of resumes against one job.")
+    parser.add_argument('job_id')
+    parser.add_argument('paths', nargs='+', help='resume files or directories of resumes')
+    parser.add_argument('--backends', default=None, help='storage backends, e.g. "sqlite,mongo" (default: STORAGE_BACKENDS)')
+    parser.add_argument('--workers', type=int, default=None, help='text extraction processes (default: all cores)')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--n-process', type=int, default=1, help='processes for the spaCy stage')
+    args = parser.parse_args()
+
+    storage = create_repository(args.backends) if args.backends else repository
+    seed_from_csv(storage)
+    job_description = storage.load_job(args.job_id)
+    if not job_description:
+        parser.error(f"job {args.job_id} not found in {storage.name}")
+
+    filepaths = collect_resume_files(args.paths)
+    results, failures = ingest_resumes(
+        filepaths,
+        job_description,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        n_process=args.n_process,
+        storage=storage
+    )
+
+    for result in results:
+        note = '  (truncated)' if result['truncated'] else ''
+        print(f"{result['relevancy_score']:6.2f}  {result['interpret_relevancy_score']:15s}  {result['filename']}{note}")
+    for failure in failures:
+        print(f"FAILED  {failure['filename']}: {failure['error']}")
+    print(f"{len(results)} scored, {len(failures)} failed")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import threading
+
+import numpy as np
+
+from embedding_store import EMBEDDING_DIM, top_k_rows
+
+try:
+    import hnswlib
+except ImportError:  # optional, only used for large job sets
+    hnswlib = None
+
+ANN_THRESHOLD = 20000  # below this many jobs an exact search is fast enough
+
+class JobIndex:
+    """
+    Nearest-neighbour index over job embeddings for resume -> job search.
+    Searches are exact (one NumPy matrix product) until the index holds ann_threshold
+    jobs and hnswlib is installed; from then on an HNSW graph is maintained as well.
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM, ann_threshold=ANN_THRESHOLD):
+        self.dim = dim
+        self.ann_threshold = ann_threshold
+        self._lock = threading.Lock()
+        self._job_ids = []
+        self._positions = {}
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._ann = None
+
+    def _normalize(self, embedding):
+        vector = np.asarray(embedding, dtype=np.float32).reshape(self.dim)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def rebuild(self, job_embeddings):
+        """Replace the index contents with {job_id: embedding}."""
+        with self._lock:
+            self._job_ids = list(job_embeddings)
+            self._positions = {job_id: position for position, job_id in enumerate(self._job_ids)}
+            self._vectors = np.zeros((max(len(self._job_ids), 16), self.dim), dtype=np.float32)
+            for position, job_id in enumerate(self._job_ids):
+                self._vectors[position] = self._normalize(job_embeddings[job_id])
+            self._ann = None
+            self._maybe_build_ann()
+
+    def add(self, job_id, embedding):
+        """Add a job, or replace its vector if its requirements changed."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            position = self._positions.get(job_id)
+            if position is None:
+                position = len(self._job_ids)
+                if position == len(self._vectors):
+                    # Grow by doubling so adds stay amortised O(1)
+                    grown = np.zeros((max(2 * len(self._vectors), 16), self.dim), dtype=np.float32)
+                    grown[:position] = self._vectors[:position]
+                    self._vectors = grown
+                self._job_ids.append(job_id)
+                self._positions[job_id] = position
+            self._vectors[position] = vector
+
+            if self._ann is not None:
+                if position >= self._ann.get_max_elements():
+                    self._ann.resize_index(2 * self._ann.get_max_elements())
+                self._ann.add_items(vector[np.newaxis, :], np.array([position]))
+            else:
+                self._maybe_build_ann()
+
+    def _maybe_build_ann(self):
+        count = len(self._job_ids)
+        if hnswlib is None or count < self.ann_threshold:
+            return
+        ann = hnswlib.Index(space='ip', dim=self.dim)
+        ann.init_index(max_elements=2 * count, ef_construction=200, M=16)
+        ann.add_items(self._vectors[:count], np.arange(count))
+        self._ann = ann
+
+    def search(self, embedding, top_n=10):
+        """[(job_id, cosine similarity), ...] for the top_n closest jobs, best first."""
+        query = self._normalize(embedding)
+        with self._lock:
+            count = len(self._job_ids)
+            if count == 0:
+                return []
+            if self._ann is not None:
+                k = min(top_n, count)
+                self._ann.set_ef(max(64, k))
+                labels, distances = self._ann.knn_query(query, k=k)
+                # 'ip' space reports 1 - inner product
+                return [(self._job_ids[label], float(1 - distance))
+                        for label, distance in zip(labels[0], distances[0])]
+            scores = self._vectors[:count] @ query
+            return [(self._job_ids[row], float(scores[row])) for row in top_k_rows(scores, top_n)]
+
+    def __len__(self):
+        return len(self._job_ids)
+
+job_index = JobIndex()
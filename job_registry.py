@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+import uuid
+
+from storage import repository
+
+JOB_REGISTRY_TTL = float(os.getenv('JOB_REGISTRY_TTL', '300'))  # seconds before a full reload regardless of the stamp
+JOB_VERSION_FILE = os.getenv('JOB_VERSION_FILE', 'data/jobs.version')
+JOB_VERSION_CHECK_INTERVAL = float(os.getenv('JOB_VERSION_CHECK_INTERVAL', '1.0'))  # seconds between stamp checks
+
+class JobRegistry:
+    """
+    Process-local cache of every job description, shared by the request threads.
+
+    Writers save the job, then replace a small version stamp file. Other processes stat()
+    that file at most once per check_interval and reload the jobs when its stamp changed,
+    so every gunicorn worker sees a new job within about a second without querying the
+    storage backend per request. A full reload also happens every ttl seconds to pick up
+    changes made without the stamp (e.g. directly in Mongo).
+
+    The jobs dict is never mutated once published; updates swap in a new dict, so readers
+    can iterate the result of all() without locking.
+    """
+
+    def __init__(self, repository, version_file=JOB_VERSION_FILE, ttl=JOB_REGISTRY_TTL,
+                 check_interval=JOB_VERSION_CHECK_INTERVAL):
+        self.repository = repository
+        self.version_file = version_file
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.version = 0  # bumped whenever this process's view of the jobs changes
+        self._jobs = None
+        self._stamp = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read_stamp(self):
+        try:
+            stat = os.stat(self.version_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _write_stamp(self):
+        # Replacing the file gives it a new inode, so the stamp changes even within one mtime tick
+        os.makedirs(os.path.dirname(self.version_file) or '.', exist_ok=True)
+        tmp_path = f"{self.version_file}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, self.version_file)
+
+    def _reload(self):
+        # Read the stamp first: a write landing during the load then triggers one more reload
+        stamp = self._read_stamp()
+        jobs = self.repository.load_jobs()
+        if jobs != self._jobs:
+            self._jobs = jobs
+            self.version += 1
+        self._stamp = stamp
+        self._loaded_at = self._checked_at = time.monotonic()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._jobs is not None and now - self._loaded_at < self.ttl and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._jobs is None or now - self._loaded_at >= self.ttl:
+                self._reload()
+            elif now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                if self._read_stamp() != self._stamp:
+                    self._reload()
+
+    def reload(self):
+        """Reload the jobs from the storage backend now, e.g. after writing to it directly."""
+        with self._lock:
+            self._reload()
+
+    def all(self):
+        """{job_id: job} for every job; treat it as read-only."""
+        self._refresh()
+        return self._jobs
+
+    def get(self, job_id):
+        """One job, falling back to the storage backend for a job this process hasn't seen yet."""
+        job = self.all().get(job_id)
+        if job is None:
+            job = self.repository.load_job(job_id)
+            if job is not None:
+                self._publish(job)
+        return job
+
+    def add(self, job):
+        """Save a new or edited job and tell the other processes about it."""
+        self.repository.save_job(job)
+        self._publish(job)
+        # This process also reloads once on its next check, which picks up any
+        # job another process added just before
+        self._write_stamp()
+
+    def _publish(self, job):
+        self._refresh()
+        with self._lock:
+            jobs = dict(self._jobs)
+            jobs[job['job_id']] = job
+            self._jobs = jobs
+            self.version += 1
+
+    def __len__(self):
+        return len(self.all())
+
+job_registry = JobRegistry(repository)
@@ -0,0 +1,140 @@
+"""
+Per-stage timing histograms for the upload hot path, exported in the Prometheus text format.
+
+Timing is off unless METRICS_ENABLED=1; when off, timed() hands back a shared no-op context
+manager. Histograms are kept per process, so under gunicorn each worker reports its own.
+Resident memory is reported per process and per loaded model (see measure_rss).
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '0') == '1'
+PROFILE_DIR = os.getenv('PROFILE_DIR')  # when set, requests with ?profile=1 dump a cProfile file here
+
+# Seconds; spans a regex pass to a slow PDF or a cold model load
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label value."""
+
+    def __init__(self, name, help_text, label, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series = {}  # label value -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series_items = sorted((value, list(series)) for value, series in self._series.items())
+        for value, series in series_items:
+            label = f'{self.label}="{value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{label}}} {series[-2]:.6f}')
+            lines.append(f'{self.name}_count{{{label}}} {series[-1]}')
+        return '\n'.join(lines)
+
+stage_seconds = Histogram(
+    'resume_stage_duration_seconds', 'Time spent in each resume processing stage.', 'stage'
+)
+request_seconds = Histogram(
+    'http_request_duration_seconds', 'Time spent serving each endpoint.', 'endpoint'
+)
+
+class _Timer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        stage_seconds.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_TIMER = _NoTimer()
+
+def timed(stage):
+    """Context manager that records how long its block takes under the given stage name."""
+    return _Timer(stage) if METRICS_ENABLED else _NO_TIMER
+
+# component -> bytes of resident memory it added while loading, in this process
+component_rss = {}
+
+def rss_bytes():
+    """This process's current resident set size."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        # Without /proc fall back to the peak RSS (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def pss_bytes():
+    """Proportional set size (shared pages split between the processes sharing them), or None without /proc."""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+@contextmanager
+def measure_rss(component):
+    """Attribute the RSS growth of the block (e.g. loading a model) to component."""
+    before = rss_bytes()
+    yield
+    component_rss[component] = max(rss_bytes() - before, 0)
+
+def render_memory():
+    lines = [
+        '# HELP process_resident_memory_bytes Resident memory size in bytes.',
+        '# TYPE process_resident_memory_bytes gauge',
+        f'process_resident_memory_bytes {rss_bytes()}',
+        '# HELP model_component_rss_bytes Resident memory each component added while it loaded in this process.',
+        '# TYPE model_component_rss_bytes gauge'
+    ]
+    lines.extend(f'model_component_rss_bytes{{component="{component}"}} {value}'
+                 for component, value in sorted(component_rss.items()))
+    return '\n'.join(lines)
+
+def render_metrics():
+    """Every histogram and the memory gauges in the Prometheus text exposition format."""
+    return '\n'.join([histogram.render() for histogram in (stage_seconds, request_seconds)] + [render_memory()]) + '\n'
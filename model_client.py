@@ -0,0 +1,134 @@
+"""
+Client side of the shared model server (see model_server.py).
+
+With MODEL_SERVER_SOCKET set, the web workers never load spaCy or the sentence encoder:
+extraction and encoding are sent over a unix socket to the one process that holds them.
+Left unset, everything runs in-process as before.
+
+Messages are framed as two big-endian uint32 lengths, a JSON header and a raw payload
+(the float32 embedding matrix of an encode reply, empty otherwise).
+"""
+import json
+import os
+import socket
+import struct
+import threading
+
+import numpy as np
+
+MODEL_SERVER_SOCKET = os.getenv('MODEL_SERVER_SOCKET')  # e.g. data/model_server.sock
+MODEL_SERVER_TIMEOUT = float(os.getenv('MODEL_SERVER_TIMEOUT', '120'))  # seconds per request
+
+_FRAME = struct.Struct('>II')
+
+class ModelServerError(RuntimeError):
+    """The model server failed the request or could not be reached."""
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError('model server connection closed')
+        received += count
+    return buffer
+
+def send_message(sock, header, payload=b''):
+    header = json.dumps(header).encode('utf-8')
+    sock.sendall(_FRAME.pack(len(header), len(payload)) + header + payload)
+
+def recv_message(sock):
+    """(header, payload), or (None, None) when the peer closed the connection between messages."""
+    try:
+        prefix = _recv_exactly(sock, _FRAME.size)
+    except ConnectionError:
+        return None, None
+    header_size, payload_size = _FRAME.unpack(prefix)
+    header = json.loads(_recv_exactly(sock, header_size))
+    return header, _recv_exactly(sock, payload_size) if payload_size else b''
+
+class ModelClient:
+    """One persistent connection per thread to the model server."""
+
+    def __init__(self, path, timeout=MODEL_SERVER_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        # A forked worker must not share the parent's connections (e.g. opened by a preload warm-up)
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError as e:
+                sock.close()
+                raise ModelServerError(f"model server not reachable at {self.path}: {e}") from e
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            self._local.sock = None
+            sock.close()
+
+    def request(self, header):
+        # A connection the server dropped (e.g. after a restart) is retried once on a new one
+        for attempt in range(2):
+            sock = self._connection()
+            try:
+                send_message(sock, header)
+                reply, payload = recv_message(sock)
+            except TimeoutError as e:
+                self._close()
+                raise ModelServerError(f"model server did not answer within {self.timeout}s") from e
+            except OSError as e:
+                self._close()
+                if attempt:
+                    raise ModelServerError(f"model server connection failed: {e}") from e
+                continue
+            if reply is None:
+                self._close()
+                if attempt:
+                    raise ModelServerError('model server closed the connection')
+                continue
+            if not reply.get('ok'):
+                raise ModelServerError(reply.get('error', 'model server error'))
+            return reply, payload
+
+    def encode(self, texts, normalize_embeddings=False):
+        """Like SentenceTransformer.encode: a (len(texts), dim) float32 array, or one row for a str."""
+        single = isinstance(texts, str)
+        reply, payload = self.request({'op': 'encode', 'texts': [texts] if single else list(texts)})
+        embeddings = np.frombuffer(payload, dtype=np.float32).reshape(reply['shape'])
+        if normalize_embeddings:
+            embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+    def extract(self, texts):
+        """ResumeAnalysis(text).extract() for each cleaned resume text."""
+        return self.request({'op': 'extract', 'texts': list(texts)})[0]['results']
+
+    def stats(self):
+        """The server's pid, RSS, per-model RSS and batching counters."""
+        return self.request({'op': 'stats'})[0]['stats']
+
+_client = ModelClient(MODEL_SERVER_SOCKET) if MODEL_SERVER_SOCKET else None
+
+def get_model_client():
+    """The model server client when MODEL_SERVER_SOCKET is set, else None (models load in-process)."""
+    return _client
+
+def serve_models_locally():
+    """Used by the model server itself, which must never forward to a server."""
+    global _client
+    _client = None
@@ -0,0 +1,188 @@
+"""
+Shared model server: one process holds spaCy and the sentence encoder for every web worker.
+
+Usage: MODEL_SERVER_SOCKET=data/model_server.sock python model_server.py [--max-batch N] [--max-wait SECONDS]
+
+Start it before gunicorn and give the workers the same MODEL_SERVER_SOCKET; they then send
+extraction and encoding requests here instead of loading their own ~1GB of models. Requests
+arriving from many workers within max_wait of each other are run as one batch (nlp.pipe /
+one encode call), so concurrent uploads share the model passes.
+"""
+import argparse
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from model_client import MODEL_SERVER_SOCKET, recv_message, send_message, serve_models_locally
+
+serve_models_locally()
+
+from embedding_store import EMBEDDING_DIM
+from extractor import analyze_resumes, get_nlp, skill_matchers
+from metrics import component_rss, rss_bytes, measure_rss
+from models import ENCODER_BATCH_SIZE, encode_texts, get_bert_model
+
+MODEL_SERVER_MAX_BATCH = int(os.getenv('MODEL_SERVER_MAX_BATCH', '64'))  # texts per model call
+MODEL_SERVER_MAX_WAIT = float(os.getenv('MODEL_SERVER_MAX_WAIT', '0.005'))  # seconds to wait for more requests
+EXTRACT_BATCH_SIZE = 16  # nlp.pipe batch size, as in ingest
+
+class Batcher:
+    """
+    Runs fn over the texts of many concurrent requests at once, on its own thread.
+
+    The thread takes the oldest request, then keeps collecting requests for up to max_wait
+    or until max_batch texts are pending, calls fn once on all their texts and hands each
+    request back its slice of the results.
+    """
+
+    def __init__(self, name, fn, max_batch=MODEL_SERVER_MAX_BATCH, max_wait=MODEL_SERVER_MAX_WAIT):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = self.items = self.batches = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name=f'batch-{name}', daemon=True).start()
+
+    def submit(self, texts):
+        future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            pending.append(request)
+            size += len(request[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            texts = [text for request_texts, _ in pending for text in request_texts]
+            try:
+                results = self.fn(texts)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for request_texts, future in pending:
+                future.set_result(results[start:start + len(request_texts)])
+                start += len(request_texts)
+            self.requests += len(pending)
+            self.items += len(texts)
+            self.batches += 1
+
+    def stats(self):
+        return {'requests': self.requests, 'items': self.items, 'batches': self.batches,
+                'mean_batch_size': round(self.items / self.batches, 2) if self.batches else None}
+
+def _encode(texts):
+    return np.asarray(encode_texts(texts, batch_size=ENCODER_BATCH_SIZE), dtype=np.float32)
+
+def _extract(texts):
+    return [analysis.extract() for analysis in analyze_resumes(texts, batch_size=EXTRACT_BATCH_SIZE)]
+
+class ModelRequestHandler(socketserver.BaseRequestHandler):
+    """Serves one worker connection: a request, its reply, and so on until the worker hangs up."""
+
+    def handle(self):
+        while True:
+            header, _ = recv_message(self.request)
+            if header is None:
+                return
+            try:
+                reply, payload = self.server.dispatch(header)
+            except Exception as e:
+                reply, payload = {'ok': False, 'error': f'{type(e).__name__}: {e}'}, b''
+            send_message(self.request, reply, payload)
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # every worker thread connects on its first request
+
+    def __init__(self, path, max_batch=MODEL_SERVER_MAX_BATCH, max_wait=MODEL_SERVER_MAX_WAIT):
+        _remove_stale_socket(path)
+        super().__init__(path, ModelRequestHandler)
+        os.chmod(path, 0o600)  # only this user's workers may connect
+        self.batchers = {
+            'encode': Batcher('encode', _encode, max_batch, max_wait),
+            'extract': Batcher('extract', _extract, max_batch, max_wait)
+        }
+
+    def dispatch(self, header):
+        op, texts = header.get('op'), header.get('texts') or []
+        if op == 'encode':
+            embeddings = self.batchers['encode'].submit(texts) if texts else np.zeros((0, EMBEDDING_DIM), np.float32)
+            return {'ok': True, 'shape': list(embeddings.shape)}, np.ascontiguousarray(embeddings).tobytes()
+        if op == 'extract':
+            return {'ok': True, 'results': self.batchers['extract'].submit(texts) if texts else []}, b''
+        if op == 'stats':
+            return {'ok': True, 'stats': self.stats()}, b''
+        raise ValueError(f"unknown op {op!r}")
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'rss_bytes': rss_bytes(),
+            'components': dict(component_rss),
+            'batches': {name: batcher.stats() for name, batcher in self.batchers.items()}
+        }
+
+def _remove_stale_socket(path):
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)  # left behind by a server that exited
+    else:
+        raise RuntimeError(f"a model server is already listening on {path}")
+    finally:
+        probe.close()
+
+def load_models():
+    """Load every model up front, recording the RSS each one adds."""
+    component_rss['runtime'] = rss_bytes()  # interpreter and imported libraries, before any model
+    get_nlp()
+    with measure_rss('skill_matcher'):
+        skill_matchers.get()
+    get_bert_model()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve spaCy extraction and sentence encoding to the web workers.")
+    parser.add_argument('--socket', default=MODEL_SERVER_SOCKET or 'data/model_server.sock')
+    parser.add_argument('--max-batch', type=int, default=MODEL_SERVER_MAX_BATCH)
+    parser.add_argument('--max-wait', type=float, default=MODEL_SERVER_MAX_WAIT)
+    args = parser.parse_args()
+
+    load_models()
+    for component, value in component_rss.items():
+        print(f"{component}: {value / 2**20:.0f} MiB")
+    os.makedirs(os.path.dirname(args.socket) or '.', exist_ok=True)
+    with ModelServer(args.socket, args.max_batch, args.max_wait) as server:
+        print(f"model server listening on {args.socket} (pid {os.getpid()})", flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(args.socket)
+
+if __name__ == '__main__':
+    main()
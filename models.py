@@ -1,45 +1,393 @@
-from sentence_transformers import SentenceTransformer, util
+import hashlib
+import os
+import threading
 
-# Load a pre-trained BERT model optimized for sentence embeddings
-bert_model = SentenceTransformer('all-MiniLM-L6-v2')
+import numpy as np
 
-def calculate_relevancy(extracted_data, job_description):
-    """
-    Calculates relevancy between a resume (extracted_data) and a job description using BERT embeddings.
-    """
+from metrics import timed, measure_rss
+from model_client import get_model_client
+from embedding_store import EMBEDDINGS_DIR, EMBEDDING_DIM, EmbeddingStore, job_embeddings, top_k_rows
+
+# Pre-trained BERT model optimized for sentence embeddings, loaded on first use (or by warm_up)
+BERT_MODEL_NAME = 'all-MiniLM-L6-v2'
+_bert_model = None
+_bert_model_lock = threading.Lock()
+
+# Encoder backends: "torch" runs the plain SentenceTransformer; "onnx" runs the same model on
+# ONNX Runtime and "onnx-int8" its dynamically int8-quantized export (both need
+# sentence-transformers>=3.2 with the onnx extra). Every backend keeps the .encode() API.
+ENCODER_BACKENDS = ('torch', 'onnx', 'onnx-int8')
+ENCODER_BACKEND = os.getenv('ENCODER_BACKEND', 'torch')
+ONNX_INT8_FILE = os.getenv('ONNX_INT8_FILE', 'onnx/model_quint8_avx2.onnx')  # quantized export shipped with the model
+ENCODER_THREADS = int(os.getenv('ENCODER_THREADS', '0'))  # intra-op threads per worker; 0 keeps the runtime default
+ENCODER_BATCH_SIZE = int(os.getenv('ENCODER_BATCH_SIZE', '32'))
+
+def load_encoder(backend=ENCODER_BACKEND, threads=ENCODER_THREADS):
+    """Load the sentence encoder on the given backend."""
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r}; choose from {ENCODER_BACKENDS}")
+    from sentence_transformers import SentenceTransformer
+    if backend == 'torch':
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(BERT_MODEL_NAME)
+
+    model_kwargs = {'provider': 'CPUExecutionProvider'}
+    if backend == 'onnx-int8':
+        model_kwargs['file_name'] = ONNX_INT8_FILE
+    if threads:
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+        model_kwargs['session_options'] = session_options
+    return SentenceTransformer(BERT_MODEL_NAME, backend='onnx', model_kwargs=model_kwargs)
+
+def encoder_name(backend=ENCODER_BACKEND):
+    """Identifies the model and backend that produced an embedding, for cache keys."""
+    return BERT_MODEL_NAME if backend == 'torch' else f"{BERT_MODEL_NAME}@{backend}"
+
+def resume_embeddings_path(backend=ENCODER_BACKEND):
+    """The resume embedding store file for vectors from one encoder backend."""
+    return os.path.join(EMBEDDINGS_DIR, 'resumes.emb' if backend == 'torch' else f"resumes@{backend}.emb")
+
+# Each backend's resume vectors live in their own store, so ranking never compares a job
+# vector with resume vectors from another encoder; resumes stored under a different
+# backend are skipped by rank_resumes and re-encoded by rescore.py
+resume_embeddings = EmbeddingStore(resume_embeddings_path())
+
+def get_bert_model():
+    """Return the shared sentence encoder, loading it on first use."""
+    global _bert_model
+    if _bert_model is None:
+        with _bert_model_lock:
+            if _bert_model is None:
+                with measure_rss('encoder'):
+                    _bert_model = load_encoder()
+    return _bert_model
+
+def encode_texts(texts, **kwargs):
+    """The shared encoder's .encode(), timed as the "encode" stage; sent to the model server when one is configured."""
+    client = get_model_client()
+    if client is not None:
+        with timed('encode'):
+            return client.encode(texts, normalize_embeddings=kwargs.get('normalize_embeddings', False))
+    model = get_bert_model()
+    with timed('encode'):
+        return model.encode(texts, **kwargs)
+
+def bert_model_loaded():
+    return _bert_model is not None
+
+def __getattr__(name):
+    # Keeps `models.bert_model` working without an import-time load
+    if name == 'bert_model':
+        return get_bert_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def cos_sim(a, b):
+    """Cosine similarity matrix between the rows of a and b (NumPy, so scoring never needs torch)."""
+    a = np.atleast_2d(np.asarray(a, dtype=np.float32))
+    b = np.atleast_2d(np.asarray(b, dtype=np.float32))
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return a @ b.T
+
+# Job embeddings are computed once per job and persisted in the job embedding store
+_job_embeddings = {}  # (job_id, content hash) -> embedding
+_job_embeddings_lock = threading.Lock()
 
-    # Join resume sections
-    resume_text = " ".join([
+def resume_to_text(extracted_data):
+    """Join the extracted resume sections into the text that gets embedded."""
+    return " ".join([
         " ".join(extracted_data.get("skills", [])),
         " ".join(extracted_data.get("education", [])),
         " ".join(extracted_data.get("experience", []))
     ])
 
-    # Join job description sections
-    job_desc_text = " ".join([
+def job_to_text(job_description):
+    """Join the job requirement sections into the text that gets embedded."""
+    return " ".join([
         " ".join(job_description.get("required_skills", [])),
         " ".join(job_description.get("required_education", [])),
         " ".join(job_description.get("required_experience", []))
     ])
 
-    # Compute embeddings
-    resume_embedding = bert_model.encode(resume_text, convert_to_tensor=True)
-    job_desc_embedding = bert_model.encode(job_desc_text, convert_to_tensor=True)
+def job_content_hash(job_description):
+    """Hash of everything that feeds a job's embedding, so edits invalidate it."""
+    content = f"{encoder_name()}\n{job_to_text(job_description)}"
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
 
-    # Cosine similarity
-    similarity_score = util.cos_sim(resume_embedding, job_desc_embedding).item()
+def _store_job_embedding(job_id, content_hash, embedding):
+    """Keep only the current embedding for a job, in memory and in the job embedding store."""
+    for key in [key for key in _job_embeddings if key[0] == job_id and key[1] != content_hash]:
+        del _job_embeddings[key]
+    _job_embeddings[(job_id, content_hash)] = embedding
+    if job_id:
+        job_embeddings.append(job_id, content_hash, embedding)
 
-    # Convert to percentage
-    relevancy_score = round(similarity_score * 100, 2)
+def get_job_embedding(job_description):
+    """
+    Returns the job description embedding, encoding it only when neither the in-memory
+    cache nor the job embedding store holds one for the job's current requirements.
+    """
+    job_id = job_description.get('job_id')
+    content_hash = job_content_hash(job_description)
+    embedding = _job_embeddings.get((job_id, content_hash))
+    if embedding is not None:
+        return embedding
 
-    return relevancy_score
+    with _job_embeddings_lock:
+        embedding = _job_embeddings.get((job_id, content_hash))
+        if embedding is not None:
+            return embedding
 
-def interpret_score(score):
-    if score > 85:
-        return "Excellent Match"
-    elif score > 70:
-        return "Good Match"
-    elif score > 50:
-        return "Moderate Match"
+        stored = job_embeddings.get(job_id) if job_id else None
+        if stored is not None and stored['content_hash'] == content_hash:
+            embedding = stored['vector']
+            _job_embeddings[(job_id, content_hash)] = embedding
+        else:
+            embedding = encode_texts(job_to_text(job_description))
+            _store_job_embedding(job_id, content_hash, embedding)
+        return embedding
+
+def encode_resume(extracted_data):
+    """Embedding of the joined resume sections."""
+    return encode_texts(resume_to_text(extracted_data))
+
+def encode_resumes(extracted_data_list, batch_size=ENCODER_BATCH_SIZE):
+    """Embeddings of many resumes, encoded in batches."""
+    resume_texts = [resume_to_text(extracted_data) for extracted_data in extracted_data_list]
+    return encode_texts(resume_texts, batch_size=batch_size)
+
+def relevancy_from_embedding(resume_embedding, job_description):
+    """Relevancy score (0-100) of an already encoded resume against a job description."""
+    similarity_score = float(cos_sim(resume_embedding, get_job_embedding(job_description))[0, 0])
+    return round(similarity_score * 100, 2)
+
+def calculate_relevancy(extracted_data, job_description):
+    """
+    Calculates relevancy between a resume (extracted_data) and a job description using BERT embeddings.
+    """
+
+    # Compute the resume embedding; the job description's is cached per job
+    resume_embedding = encode_resume(extracted_data)
+
+    # Cosine similarity, converted to percentage
+    return relevancy_from_embedding(resume_embedding, job_description)
+
+def relevancy_from_embeddings(resume_embeddings, job_description):
+    """Relevancy scores (0-100) of many already encoded resumes against one job description."""
+    if len(resume_embeddings) == 0:
+        return []
+    resume_embeddings = np.asarray(resume_embeddings, dtype=np.float32)
+    similarity_scores = cos_sim(resume_embeddings, get_job_embedding(job_description))[:, 0].tolist()
+    return [round(score * 100, 2) for score in similarity_scores]
+
+def calculate_relevancy_batch(extracted_data_list, job_description, batch_size=ENCODER_BATCH_SIZE):
+    """
+    Scores many resumes against one job description, encoding the resumes in batches
+    and reusing the cached job description embedding.
+    """
+    if not extracted_data_list:
+        return []
+    resume_embeddings = encode_resumes(extracted_data_list, batch_size=batch_size)
+    return relevancy_from_embeddings(resume_embeddings, job_description)
+
+def rank_resumes(job_description, job_id=None, top_k=None, store=resume_embeddings):
+    """
+    Re-scores stored resume embeddings against a job description in one matrix product.
+    Only resumes uploaded for job_id are ranked when it is given, otherwise every stored resume.
+    Returns [(resume_id, job_id, relevancy_score), ...] best first.
+    """
+    if job_id is None:
+        records, rows = store.live_rows()
     else:
-        return "Low Match"
+        records, rows = store.rows_for_job(job_id)
+    if len(records) == 0 or (rows is not None and len(rows) == 0):
+        return []
+
+    # Stored vectors are unit length, so a dot product with the normalized job embedding is the cosine
+    job_desc_embedding = np.asarray(get_job_embedding(job_description), dtype=np.float32)
+    job_desc_embedding = job_desc_embedding / np.linalg.norm(job_desc_embedding)
+    selected = records if rows is None else records[rows]
+    scores = selected['vector'] @ job_desc_embedding
+
+    ranked = []
+    for index in top_k_rows(scores, top_k):
+        record = selected[index]
+        ranked.append((
+            record['resume_id'].decode('ascii'),
+            record['job_id'].decode('ascii'),
+            round(float(scores[index]) * 100, 2)
+        ))
+    return ranked
+
+# Scoring modes: "concat" embeds one joined string per resume, which MiniLM truncates to its
+# first few hundred tokens; "sections" embeds every skill, education and experience item
+SCORING_MODE = os.getenv('SCORING_MODE', 'concat')
+SECTIONS = ('skills', 'education', 'experience')
+JOB_SECTION_KEYS = {'skills': 'required_skills', 'education': 'required_education', 'experience': 'required_experience'}
+ITEM_MATCH_THRESHOLD = float(os.getenv('ITEM_MATCH_THRESHOLD', '0.7'))  # a requirement is met by an item this similar
+MAX_SECTION_ITEMS = int(os.getenv('MAX_SECTION_ITEMS', '100'))
+
+def parse_section_weights(value):
+    """Parse "skills:0.5,education:0.2,experience:0.3" into a weight per section."""
+    weights = dict.fromkeys(SECTIONS, 0.0)
+    for part in value.split(','):
+        section, _, weight = part.partition(':')
+        section = section.strip()
+        if section not in weights:
+            raise ValueError(f"Unknown section {section!r} in section weights; choose from {SECTIONS}")
+        weights[section] = float(weight)
+    return weights
+
+SECTION_WEIGHTS = parse_section_weights(os.getenv('SECTION_WEIGHTS', 'skills:0.5,education:0.2,experience:0.3'))
+
+_job_item_embeddings = {}  # (job_id, content hash) -> embeddings of the job's requirement items
+
+def section_items(data, keys=None):
+    """The unique non-empty items of each section, in order and capped at MAX_SECTION_ITEMS."""
+    keys = keys or dict(zip(SECTIONS, SECTIONS))
+    items = {}
+    for section in SECTIONS:
+        values = (item.strip() for item in data.get(keys[section], []) if item)
+        items[section] = list(dict.fromkeys(value for value in values if value))[:MAX_SECTION_ITEMS]
+    return items
+
+def _flatten_sections(items):
+    """All items in section order, plus each section's (start, stop) rows."""
+    texts, spans = [], {}
+    for section in SECTIONS:
+        start = len(texts)
+        texts.extend(items[section])
+        spans[section] = (start, len(texts))
+    return texts, spans
+
+def _encode_items(texts, batch_size=ENCODER_BATCH_SIZE):
+    if not texts:
+        return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    return encode_texts(texts, batch_size=batch_size, normalize_embeddings=True)
+
+def get_job_item_embeddings(job_description):
+    """Unit-length embeddings of a job's requirement items, encoded once per job version."""
+    job_id = job_description.get('job_id')
+    key = (job_id, job_content_hash(job_description))
+    embeddings = _job_item_embeddings.get(key)
+    if embeddings is None:
+        texts, _ = _flatten_sections(section_items(job_description, JOB_SECTION_KEYS))
+        embeddings = _encode_items(texts)
+        with _job_embeddings_lock:
+            for stale in [stale for stale in _job_item_embeddings if stale[0] == job_id]:
+                del _job_item_embeddings[stale]
+            _job_item_embeddings[key] = embeddings
+    return embeddings
+
+# Item vectors depend only on the item's text and the encoder, so each distinct item is stored
+# once and shared by every resume listing it; re-scores encode only items never seen before
+item_embeddings = EmbeddingStore(os.path.join(EMBEDDINGS_DIR, 'items.emb'), id_fields=('item_key',), group_field=None)
+
+def item_key(text):
+    """Store key of an item text under the current encoder."""
+    return hashlib.sha1(f"{encoder_name()}\n{text}".encode('utf-8')).hexdigest()[:32]
+
+def stored_item_embeddings(texts, store=item_embeddings, batch_size=ENCODER_BATCH_SIZE):
+    """Unit-length embeddings of item texts, encoding (and storing) only those the item store lacks."""
+    keys = [item_key(text) for text in texts]
+    found = store.get_vectors(keys)
+    new_texts = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in found))
+    if new_texts:
+        encoded = _encode_items(new_texts, batch_size)
+        entries = [(item_key(text), embedding) for text, embedding in zip(new_texts, encoded)]
+        store.append_many(entries)
+        found.update((key, np.asarray(embedding, dtype=np.float32)) for key, embedding in entries)
+    if not keys:
+        return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    return np.stack([found[key] for key in keys])
+
+def resumes_item_embeddings(extracted_data_list, store=item_embeddings, batch_size=ENCODER_BATCH_SIZE):
+    """The per-item embeddings of each resume, as encode_resumes_sections returns them, from the item store."""
+    items_list = [_flatten_sections(section_items(extracted_data))[0] for extracted_data in extracted_data_list]
+    embeddings = stored_item_embeddings([text for items in items_list for text in items], store, batch_size)
+    encoded, start = [], 0
+    for items in items_list:
+        encoded.append(embeddings[start:start + len(items)])
+        start += len(items)
+    return encoded
+
+def encode_resume_sections(extracted_data):
+    """
+    The joined-text embedding and the per-item embeddings of one resume, from a single encode call.
+    Returns (resume_embedding, item_embeddings).
+    """
+    texts, _ = _flatten_sections(section_items(extracted_data))
+    embeddings = encode_texts(
+        [resume_to_text(extracted_data)] + texts, batch_size=ENCODER_BATCH_SIZE, normalize_embeddings=True
+    )
+    return embeddings[0], embeddings[1:]
+
+def encode_resumes_sections(extracted_data_list, batch_size=ENCODER_BATCH_SIZE):
+    """encode_resume_sections for many resumes, with every text going through one batched encode call."""
+    texts, counts = [], []
+    for extracted_data in extracted_data_list:
+        items, _ = _flatten_sections(section_items(extracted_data))
+        texts.append(resume_to_text(extracted_data))
+        texts.extend(items)
+        counts.append(len(items) + 1)
+    embeddings = _encode_items(texts, batch_size=batch_size)
+
+    encoded, start = [], 0
+    for count in counts:
+        encoded.append((embeddings[start], embeddings[start + 1:start + count]))
+        start += count
+    return encoded
+
+def section_relevancy(extracted_data, job_description, item_embeddings=None, weights=None):
+    """
+    Section-aware relevancy of a resume against a job description.
+    Every requirement is matched to its most similar resume item in the same section; a section
+    scores the mean of those best matches and the relevancy score (0-100) is the weighted mean
+    over the sections the job has requirements for. Requirements whose best match stays below
+    ITEM_MATCH_THRESHOLD are reported missing, in place of exact string comparison.
+    Returns (relevancy_score, missing_requirements, section_scores).
+    """
+    weights = SECTION_WEIGHTS if weights is None else weights
+    resume_texts, resume_spans = _flatten_sections(section_items(extracted_data))
+    job_items = section_items(job_description, JOB_SECTION_KEYS)
+    _, job_spans = _flatten_sections(job_items)
+    if item_embeddings is None or len(item_embeddings) != len(resume_texts):
+        item_embeddings = _encode_items(resume_texts)
+
+    # One product scores every resume item against every requirement; each section is a block of it
+    similarities = np.asarray(item_embeddings, dtype=np.float32) @ np.asarray(
+        get_job_item_embeddings(job_description), dtype=np.float32).T
+
+    section_scores, missing = {}, {}
+    weighted_sum = weight_total = 0.0
+    for section in SECTIONS:
+        requirements = job_items[section]
+        missing[section] = []
+        if not requirements:
+            continue
+        (resume_start, resume_stop), (job_start, job_stop) = resume_spans[section], job_spans[section]
+        if resume_stop > resume_start:
+            best = similarities[resume_start:resume_stop, job_start:job_stop].max(axis=0)
+        else:
+            best = np.zeros(len(requirements), dtype=np.float32)
+        section_scores[section] = round(float(best.mean()) * 100, 2)
+        missing[section] = [requirement for requirement, score in zip(requirements, best) if score < ITEM_MATCH_THRESHOLD]
+        weighted_sum += weights[section] * float(best.mean())
+        weight_total += weights[section]
+
+    relevancy_score = round(weighted_sum / weight_total * 100, 2) if weight_total else 0.0
+    return relevancy_score, missing, section_scores
+
+# (exclusive lower bound, label), highest first; scores at or below the last bound are a "Low Match"
+SCORE_LABELS = ((85, "Excellent Match"), (70, "Good Match"), (50, "Moderate Match"))
+
+def interpret_score(score):
+    for threshold, label in SCORE_LABELS:
+        if score > threshold:
+            return label
+    return "Low Match"
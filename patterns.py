@@ -0,0 +1,42 @@
+"""Regular expressions used by the extractors, compiled once at import."""
+import re
+
+# Strings that look like numbers, dates, times, URLs, handles or bare punctuation rather than skills.
+# Applied with .match() to the lowercased candidate, so every branch is anchored at the start.
+NON_SKILL_RE = re.compile(
+    r'[\d\s\-/.]+$'                                      # Numbers, dates and formatting
+    r'|[^\w\s]+$'                                        # Only punctuation or special characters
+    r'|[0-9]+(?:st|nd|rd|th)$'                           # Ordinals like 1st, 2nd
+    r'|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)$'  # Month abbreviations
+    r'|(?:www|http|https|ftp)'                           # URLs
+    r'|@'                                                # Social media handles
+    r'|\d{1,2}/\d{1,2}/\d{2,4}$'                         # Dates
+    r'|\d{1,2}:\d{2}$'                                   # Times
+    r'|\d+(?:h|hrs|hours|m|mins|minutes)$'               # Time durations
+)
+
+# clean_text: runs of non-ASCII characters and whitespace collapse to one space,
+# then "cid:" glyph references and literal "[§]" artifacts are dropped
+# (one character class equal to "non-ASCII or \s", which is much faster than the alternation)
+WHITESPACE_RE = re.compile(r'[^\x00-\x08\x0e-\x1b\x21-\x7f]+')
+ARTIFACTS_RE = re.compile(r'cid:\S+|\[\\u00a7\]')
+
+def build_degree_regex(degree_types):
+    """
+    One case-insensitive alternation over every degree type, longest first so
+    "Master of Science" wins over "Master", followed by an optional "of X" / "in Y".
+    The degree must end at a word boundary (optionally pluralised), so "MA" no longer
+    matches the start of "Machine".
+    """
+    alternation = '|'.join(re.escape(degree) for degree in sorted(set(degree_types), key=len, reverse=True))
+    return re.compile(
+        r'\b((?:' + alternation + r")(?:'s|’s|s)?(?![A-Za-z])"
+        r'(?:\s+of\s+[A-Za-z]+)?(?:\s+in\s+[^,\.]*)?)',
+        re.IGNORECASE
+    )
+
+# normalize_term: possessives are dropped ("Bachelor’s" -> "bachelor") and hyphens, underscores,
+# brackets and list punctuation separate words, so "Scikit-learn" and "scikit learn" agree.
+# Dots, slashes, "+" and "#" stay inside words for "Node.js", "CI/CD", "C++" and "C#".
+POSSESSIVE_RE = re.compile(r"['’]s\b")
+TERM_SEPARATOR_RE = re.compile(r"[\s\-_,;:()\[\]{}'’\"|&]+")
@@ -0,0 +1,99 @@
+"""Per-file resume analysis and scoring shared by the upload endpoints and the task queue."""
+import uuid
+
+from extractor import extract_text_limited, ResumeAnalysis
+from models import (
+    SCORING_MODE,
+    resume_embeddings,
+    encode_resume,
+    encode_resume_sections,
+    relevancy_from_embedding,
+    section_relevancy,
+    interpret_score
+)
+from resume_cache import resume_cache, resume_cache_key
+from metrics import timed
+from storage import repository
+from utils import get_missing_requirements, get_required_data
+
+def _analyze_resume_file(filepath, cache=resume_cache, with_items=False):
+    """analyze_resume_file that also returns the per-item embeddings when with_items is set (else None)."""
+    content_hash = resume_cache_key(filepath)
+    entry = cache.get(content_hash)
+    if entry is not None:
+        return entry['extracted_data'], entry['embedding'], entry['item_embeddings'], True, entry['truncated']
+
+    with timed('extract_text'):
+        text, truncated_by = extract_text_limited(filepath)
+    analysis = ResumeAnalysis(text)
+    extracted_data = analysis.extract()
+    if with_items:
+        resume_embedding, item_embeddings = encode_resume_sections(extracted_data)
+    else:
+        resume_embedding, item_embeddings = encode_resume(extracted_data), None
+    truncated = truncated_by is not None
+    # Where the time budget ran out depends on the load at the time, so that result isn't cached
+    if truncated_by != 'time':
+        cache.put(content_hash, analysis.text, extracted_data, resume_embedding, item_embeddings, truncated)
+    return extracted_data, resume_embedding, item_embeddings, False, truncated
+
+def analyze_resume_file(filepath, cache=resume_cache):
+    """
+    Extract and embed a resume file, reusing the cached result for files seen before.
+    Returns (extracted_data, resume_embedding, cache_hit, truncated); truncated is set when the
+    page, size or time limits cut the text short, so the analysis covers only part of the file.
+    """
+    extracted_data, resume_embedding, _, cache_hit, truncated = _analyze_resume_file(filepath, cache)
+    return extracted_data, resume_embedding, cache_hit, truncated
+
+def score_extracted(extracted_data, resume_embedding, job_description, item_embeddings=None, mode=SCORING_MODE):
+    """Relevancy score and missing requirements of an analysed resume under the given scoring mode."""
+    with timed('score'):
+        return _score_extracted(extracted_data, resume_embedding, job_description, item_embeddings, mode)
+
+def _score_extracted(extracted_data, resume_embedding, job_description, item_embeddings, mode):
+    if mode == 'sections':
+        relevancy_score, missing_requirements, _ = section_relevancy(extracted_data, job_description, item_embeddings)
+        return relevancy_score, missing_requirements
+    relevancy_score = relevancy_from_embedding(resume_embedding, job_description)
+    return relevancy_score, get_missing_requirements(extracted_data, get_required_data(job_description))
+
+def score_resume_file(filepath, job_description):
+    """
+    Run the full upload pipeline for one resume file against one job: analyse (or reuse the
+    cached analysis), score, and store the result. Returns the upload response payload, whose
+    truncated flag tells the caller that only part of the file was scored.
+    """
+    job_id = job_description['job_id']
+
+    # Extract and embed, or reuse the cached result for a file seen before
+    extracted_data, resume_embedding, item_embeddings, cache_hit, truncated = _analyze_resume_file(
+        filepath, with_items=SCORING_MODE == 'sections'
+    )
+
+    # Calculate Relevancy Score
+    relevancy_score, missing_requirements = score_extracted(extracted_data, resume_embedding, job_description, item_embeddings)
+    interpret_relevancy_score = interpret_score(relevancy_score)
+    resume_id = str(uuid.uuid4())
+    with timed('embedding_append'):
+        resume_embeddings.append(resume_id, job_id, resume_embedding)
+
+    # Save to the configured storage backends
+    repository.save_score({
+        'resume_id': resume_id,
+        'job_id': job_id,
+        'relevancy_score': relevancy_score,
+        'interpret_relevancy_score': interpret_relevancy_score,
+        'extracted_data': extracted_data,
+        'missing_data': missing_requirements
+    })
+
+    return {
+        'resume_id': resume_id,
+        'relevancy_score': relevancy_score,
+        'interpret_relevancy_score': interpret_relevancy_score,
+        'extracted': extracted_data,
+        'missing': missing_requirements,
+        'cached': cache_hit,
+        'truncated': truncated
+    }
@@ -0,0 +1,225 @@
+"""Re-score stored results after a job's requirements or the scoring settings change.
+
+Usage: python rescore.py [job_id ...] [--all] [--force] [--batch-size N] [--backends sqlite,mongo]
+
+Only jobs whose scoring signature changed since their last re-score are processed unless --force
+is given. Nothing is re-parsed: scores are recomputed from the stored extracted_data and the
+resume embedding store, and an interrupted run resumes from its checkpoint. In the "sections"
+scoring mode the per-item vectors come from the item embedding store, so only items no earlier
+run (of any job) has seen are encoded; the first run over a corpus encodes every distinct item.
+
+A run holds a per-job lock file, so the CLI and POST /recruiter/rescore never re-score the same
+job (and write its checkpoint) at the same time; the second one fails with RescoreRunning.
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+from models import (
+    SCORING_MODE,
+    SECTION_WEIGHTS,
+    ITEM_MATCH_THRESHOLD,
+    SCORE_LABELS,
+    encode_resumes,
+    resumes_item_embeddings,
+    job_content_hash,
+    relevancy_from_embeddings,
+    section_relevancy,
+    interpret_score,
+    resume_embeddings
+)
+from storage import repository, create_repository, seed_from_csv
+from utils import get_missing_requirements, get_required_data
+
+RESCORE_DIR = 'data/rescore'
+RESCORE_BATCH_SIZE = 1000
+
+class RescoreRunning(RuntimeError):
+    """Another process or thread is already re-scoring the job."""
+
+def scoring_signature(job_description, mode=SCORING_MODE):
+    """What a job's stored scores depend on: its requirements, the scoring settings and the labels."""
+    scoring = {'mode': mode}
+    if mode == 'sections':
+        scoring.update(weights=SECTION_WEIGHTS, item_match_threshold=ITEM_MATCH_THRESHOLD)
+    return {
+        'job': job_content_hash(job_description),
+        'scoring': hashlib.sha1(json.dumps(scoring, sort_keys=True).encode('utf-8')).hexdigest()[:16],
+        'labels': hashlib.sha1(json.dumps(SCORE_LABELS).encode('utf-8')).hexdigest()[:16]
+    }
+
+def _checkpoint_path(job_id, directory):
+    return os.path.join(directory, f"{job_id}.json")
+
+def load_checkpoint(job_id, directory=RESCORE_DIR):
+    try:
+        with open(_checkpoint_path(job_id, directory), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_checkpoint(job_id, checkpoint, directory=RESCORE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = _checkpoint_path(job_id, directory)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(path + '.tmp', path)
+
+@contextmanager
+def _job_lock(job_id, directory):
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(os.path.join(directory, f"{job_id}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RescoreRunning(f"job {job_id} is already being re-scored") from None
+        yield
+    finally:
+        os.close(fd)  # also releases the flock
+
+def _stored_vectors(job_id, store):
+    """{resume_id: unit-length vector} for the job's resumes in the embedding store."""
+    records, rows = store.rows_for_job(job_id)
+    selected = records[rows]
+    return dict(zip((resume_id.decode('ascii') for resume_id in selected['resume_id'].tolist()), selected['vector']))
+
+def _rescore_batch(batch, job_description, vectors, mode, labels_only, store):
+    """New (relevancy_score, missing_data) for each record in the batch."""
+    if labels_only:
+        return [(record['relevancy_score'], record['missing_data']) for record in batch]
+
+    extracted_data_list = [record['extracted_data'] for record in batch]
+
+    # Resumes scored before the embedding store existed (or under another encoder backend)
+    # are encoded from their extracted data once
+    missing = [index for index, record in enumerate(batch) if record['resume_id'] not in vectors]
+    if missing:
+        encoded = encode_resumes([extracted_data_list[index] for index in missing])
+        for index, resume_embedding in zip(missing, encoded):
+            vectors[batch[index]['resume_id']] = resume_embedding
+        store.append_many([(batch[index]['resume_id'], batch[index]['job_id'], resume_embedding)
+                           for index, resume_embedding in zip(missing, encoded)])
+
+    if mode == 'sections':
+        return [
+            section_relevancy(extracted_data, job_description, item_embeddings)[:2]
+            for extracted_data, item_embeddings in zip(extracted_data_list, resumes_item_embeddings(extracted_data_list))
+        ]
+
+    # One matrix product scores the whole batch
+    scores = relevancy_from_embeddings(np.stack([vectors[record['resume_id']] for record in batch]), job_description)
+    required_data = get_required_data(job_description)
+    return [(score, get_missing_requirements(extracted_data, required_data))
+            for score, extracted_data in zip(scores, extracted_data_list)]
+
+def _same_result(a, b):
+    # Missing requirements come from set differences, so their order carries no meaning
+    return (a['relevancy_score'] == b['relevancy_score']
+            and a['interpret_relevancy_score'] == b['interpret_relevancy_score']
+            and {key: set(values) for key, values in a['missing_data'].items()}
+            == {key: set(values) for key, values in b['missing_data'].items()})
+
+def rescore_job(job_description, storage=repository, store=resume_embeddings, batch_size=RESCORE_BATCH_SIZE,
+                mode=SCORING_MODE, force=False, checkpoint_dir=RESCORE_DIR, progress=None):
+    """
+    Bring one job's stored scores up to date with its current requirements and scoring settings.
+    Only records whose score, label or missing requirements change are written. When only the
+    score labels changed, the stored scores are relabelled without touching any vectors.
+    progress(done, total) is called after each batch.
+    Returns {'job_id', 'total', 'processed', 'updated', 'skipped'}; raises RescoreRunning when the
+    job is already being re-scored.
+    """
+    with _job_lock(job_description['job_id'], checkpoint_dir):
+        return _rescore_job(job_description, storage, store, batch_size, mode, force, checkpoint_dir, progress)
+
+def _rescore_job(job_description, storage, store, batch_size, mode, force, checkpoint_dir, progress):
+    job_id = job_description['job_id']
+    signature = scoring_signature(job_description, mode)
+    checkpoint = load_checkpoint(job_id, checkpoint_dir)
+    summary = {'job_id': job_id, 'total': 0, 'processed': 0, 'updated': 0, 'skipped': False}
+    if checkpoint and checkpoint['target'] == signature and checkpoint['complete'] and not force:
+        summary['skipped'] = True
+        return summary
+
+    if checkpoint and checkpoint['target'] == signature and not checkpoint['complete'] and not force:
+        # Resume an interrupted run of the same re-score
+        applied, last_resume_id, updated = checkpoint['applied'], checkpoint['last_resume_id'], checkpoint['updated']
+    else:
+        applied = checkpoint['target'] if checkpoint and checkpoint['complete'] else None
+        last_resume_id, updated = '', 0
+    labels_only = (not force and applied is not None
+                   and applied['job'] == signature['job'] and applied['scoring'] == signature['scoring'])
+
+    # resume_id order makes the checkpoint a simple high-water mark
+    records = sorted(storage.load_scores(job_id), key=lambda record: record['resume_id'])
+    summary['total'] = len(records)
+    pending = [record for record in records if record['resume_id'] > last_resume_id]
+    summary['processed'] = len(records) - len(pending)
+    vectors = {} if labels_only else _stored_vectors(job_id, store)
+
+    for offset in range(0, len(pending), batch_size):
+        batch = pending[offset:offset + batch_size]
+        changed = []
+        for record, (relevancy_score, missing_data) in zip(
+                batch, _rescore_batch(batch, job_description, vectors, mode, labels_only, store)):
+            rescored = dict(record, relevancy_score=relevancy_score,
+                            interpret_relevancy_score=interpret_score(relevancy_score), missing_data=missing_data)
+            if not _same_result(rescored, record):
+                changed.append(rescored)
+        storage.update_scores(changed)
+
+        updated += len(changed)
+        summary['processed'] += len(batch)
+        save_checkpoint(job_id, {
+            'target': signature, 'applied': applied, 'complete': False,
+            'last_resume_id': batch[-1]['resume_id'], 'updated': updated
+        }, checkpoint_dir)
+        if progress:
+            progress(summary['processed'], summary['total'])
+
+    save_checkpoint(job_id, {'target': signature, 'applied': signature, 'complete': True,
+                             'last_resume_id': '', 'updated': updated}, checkpoint_dir)
+    summary['updated'] = updated
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored results against current job requirements.")
+    parser.add_argument('job_ids', nargs='*')
+    parser.add_argument('--all', action='store_true', help='every job (only those whose signature changed, unless --force)')
+    parser.add_argument('--force', action='store_true', help='recompute every record even if nothing changed')
+    parser.add_argument('--batch-size', type=int, default=RESCORE_BATCH_SIZE)
+    parser.add_argument('--backends', default=None, help='storage backends, e.g. "sqlite,mongo" (default: STORAGE_BACKENDS)')
+    args = parser.parse_args()
+    if not args.job_ids and not args.all:
+        parser.error('give job ids or --all')
+
+    storage = create_repository(args.backends) if args.backends else repository
+    seed_from_csv(storage)
+    jobs = storage.load_jobs()
+    for job_id in args.job_ids:
+        if job_id not in jobs:
+            parser.error(f"job {job_id} not found in {storage.name}")
+    job_ids = list(jobs) if args.all else args.job_ids
+
+    for job_id in job_ids:
+        def progress(done, total):
+            print(f"\r{job_id}: {done}/{total}", end='', flush=True)
+        try:
+            summary = rescore_job(jobs[job_id], storage=storage, batch_size=args.batch_size,
+                                  force=args.force, progress=progress)
+        except RescoreRunning as e:
+            print(f"{job_id}: skipped, {e}")
+            continue
+        if summary['skipped']:
+            print(f"{job_id}: up to date")
+        else:
+            print(f"\r{job_id}: {summary['processed']}/{summary['total']} re-scored, {summary['updated']} changed")
+
+if __name__ == '__main__':
+    main()
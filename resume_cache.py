@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from extractor import (
+    EXTRACTOR_VERSION,
+    SPACY_PROFILE,
+    MAX_PDF_PAGES,
+    MAX_TEXT_CHARS,
+    EXTRACTION_TIME_BUDGET,
+    SKILLS_LIST,
+    NON_SKILLS,
+    DEGREE_TYPES,
+    FIELDS_OF_STUDY
+)
+from models import encoder_name
+
+RESUME_CACHE_DIR = 'data/resume_cache'
+RESUME_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# The term lists the extractors match against; editing any of them changes what a resume yields
+VOCABULARY_HASH = hashlib.sha256(
+    json.dumps([SKILLS_LIST, NON_SKILLS, DEGREE_TYPES, FIELDS_OF_STUDY]).encode('utf-8')
+).hexdigest()[:16]
+
+# Everything besides the file that a cached analysis depends on; entries made under other
+# settings get different keys and are evicted as they age
+ANALYSIS_VERSION = (
+    f"extractor={EXTRACTOR_VERSION};spacy={SPACY_PROFILE};encoder={encoder_name()};"
+    f"max_pages={MAX_PDF_PAGES};max_chars={MAX_TEXT_CHARS};time_budget={EXTRACTION_TIME_BUDGET};"
+    f"vocabulary={VOCABULARY_HASH}"
+)
+
+def file_content_hash(file_path, chunk_size=1024 * 1024, prefix=b''):
+    """SHA-256 of a file's bytes (after prefix, if given), read in chunks."""
+    digest = hashlib.sha256(prefix)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def resume_cache_key(file_path):
+    """Cache key of a resume file: the hash of its bytes under the current ANALYSIS_VERSION."""
+    return file_content_hash(file_path, prefix=ANALYSIS_VERSION.encode('utf-8') + b'\n')
+
+class ResumeCache:
+    """
+    On-disk cache of resume analysis results keyed by resume_cache_key (file content and analysis settings).
+    Each entry is a <hash>.json (text, its truncated flag and extracted_data) plus a <hash>.npy
+    embedding; in the "sections" scoring mode the .npy holds the resume embedding followed by
+    one row per item.
+    Entries are evicted least recently used first once the cache grows past max_bytes.
+    """
+
+    def __init__(self, directory=RESUME_CACHE_DIR, max_bytes=RESUME_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _paths(self, content_hash):
+        base = os.path.join(self.directory, content_hash)
+        return base + '.json', base + '.npy'
+
+    def get(self, content_hash):
+        """Return {'text', 'truncated', 'extracted_data', 'embedding', 'item_embeddings'} for a cached file, or None."""
+        json_path, npy_path = self._paths(content_hash)
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            embeddings = np.load(npy_path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        entry.setdefault('truncated', False)
+        if embeddings.ndim == 2:
+            entry['embedding'], entry['item_embeddings'] = embeddings[0], embeddings[1:]
+        else:
+            entry['embedding'], entry['item_embeddings'] = embeddings, None
+
+        # Touch the entry so eviction sees it as recently used
+        for path in (json_path, npy_path):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, content_hash, text, extracted_data, embedding, item_embeddings=None, truncated=False):
+        """Store one analysed resume, then evict old entries if over the size bound."""
+        embeddings = np.asarray(embedding, dtype=np.float32)
+        if item_embeddings is not None:
+            embeddings = np.vstack([embeddings, np.asarray(item_embeddings, dtype=np.float32).reshape(-1, embeddings.shape[-1])])
+        os.makedirs(self.directory, exist_ok=True)
+        json_path, npy_path = self._paths(content_hash)
+
+        # Write the embedding first: an entry only counts once its .json exists
+        with open(npy_path + '.tmp', 'wb') as f:
+            np.save(f, embeddings)
+        os.replace(npy_path + '.tmp', npy_path)
+        with open(json_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'text': text, 'truncated': truncated, 'extracted_data': extracted_data}, f)
+        os.replace(json_path + '.tmp', json_path)
+
+        with self._lock:
+            if self._size is not None:
+                self._size += os.path.getsize(json_path) + os.path.getsize(npy_path)
+            self._evict()
+
+    def _entries(self):
+        """(last used, size, hash) for every entry currently on disk."""
+        entries = {}
+        for name in os.listdir(self.directory):
+            content_hash, ext = os.path.splitext(name)
+            if ext not in ('.json', '.npy'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            last_used, size = entries.get(content_hash, (0, 0))
+            entries[content_hash] = (max(last_used, stat.st_mtime), size + stat.st_size)
+        return [(last_used, size, content_hash) for content_hash, (last_used, size) in entries.items()]
+
+    def _evict(self):
+        if self._size is not None and self._size <= self.max_bytes:
+            return
+        entries = self._entries()
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, content_hash in sorted(entries):
+            if self._size <= self.max_bytes:
+                break
+            for path in self._paths(content_hash):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes
+            }
+
+resume_cache = ResumeCache()
@@ -0,0 +1,529 @@
+"""
+Storage backends for job descriptions and relevancy scores.
+
+Every backend implements the same repository methods:
+    save_jobs(jobs), load_jobs(), load_job(job_id),
+    save_scores(records), update_scores(records), count_scores(job_id), scores_page(job_id, page, per_page), load_scores(job_id),
+    job_stats(job_id, top), job_summaries()
+
+STORAGE_BACKENDS picks the backends as a comma-separated list, e.g. "sqlite" (the default),
+"mongo", or "sqlite,mongo,csv". Reads go to the first backend; writes go to all of them,
+so dual writes only happen when more than one backend is configured.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from pymongo import UpdateOne
+
+from analytics import (
+    SCORE_BIN_WIDTH,
+    SCORE_BINS,
+    MISSING_SECTIONS,
+    TOP_MISSING,
+    record_counts,
+    stat_deltas,
+    stats_from_counts,
+    stats_from_records,
+    summary_from_counts
+)
+from metrics import timed
+
+from utils import (
+    get_mongo_db,
+    load_job_descriptions_csv,
+    save_job_descriptions_csv,
+    load_relevancy_scores_csv,
+    save_relevancy_scores_csv,
+    update_relevancy_scores_csv,
+    save_relevancy_scores_mongodb,
+    update_relevancy_scores_mongodb
+)
+
+STORAGE_BACKENDS = os.getenv('STORAGE_BACKENDS', 'sqlite')
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/resume_ranking.db')
+MONGO_SUMMARY_TTL = float(os.getenv('MONGO_SUMMARY_TTL', '30'))  # seconds Mongo's job_summaries result is reused
+JOB_DESCRIPTIONS_FILE = 'data/job_descriptions.csv'
+RELEVANCY_SCORES_FILE = 'data/relevancy_scores.csv'
+
+JOB_LIST_FIELDS = ('required_skills', 'required_education', 'required_experience')
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_descriptions (
+    job_id TEXT PRIMARY KEY,
+    job_title TEXT NOT NULL,
+    job_description TEXT NOT NULL,
+    required_skills TEXT NOT NULL,
+    required_education TEXT NOT NULL,
+    required_experience TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS relevancy_scores (
+    resume_id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    relevancy_score REAL NOT NULL,
+    interpret_relevancy_score TEXT NOT NULL,
+    extracted_data TEXT NOT NULL,
+    missing_data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_relevancy_scores_job_score
+    ON relevancy_scores (job_id, relevancy_score DESC);
+CREATE TABLE IF NOT EXISTS job_stats (
+    job_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (job_id, kind, name)
+) WITHOUT ROWID;
+"""
+
+SQLITE_IN_CHUNK = 500  # resume_ids per "IN (...)" lookup, under SQLite's parameter limit
+
+def _page_bounds(page, per_page):
+    return per_page, (page - 1) * per_page
+
+def csv_score_record(resume_id, score_data):
+    """Turn an entry of load_relevancy_scores_csv into a score record."""
+    return {
+        'resume_id': resume_id,
+        'job_id': score_data['job_id'],
+        'relevancy_score': score_data['relevancy_score'],
+        'interpret_relevancy_score': score_data['interpret_relevancy_score'],
+        'extracted_data': score_data['extracted_data'],
+        'missing_data': {
+            'skills': score_data['missing_skills'],
+            'education': score_data['missing_education'],
+            'experience': score_data['missing_experience']
+        }
+    }
+
+class SQLiteRepository:
+    """
+    Embedded local backend; scores are indexed by (job_id, relevancy_score).
+
+    job_stats holds per-job aggregate counters (see analytics.stat_deltas), adjusted in the
+    same transaction as every score write, so analytics never scan relevancy_scores.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread; one
+        # inherited across a fork (e.g. opened by a preloading gunicorn master) is left alone
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SQLITE_SCHEMA)
+            self._backfill_stats(connection)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _backfill_stats(self, connection):
+        # Databases created before job_stats existed get their counters built once
+        if (connection.execute('SELECT 1 FROM job_stats LIMIT 1').fetchone() is not None
+                or connection.execute('SELECT 1 FROM relevancy_scores LIMIT 1').fetchone() is None):
+            return
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            if connection.execute('SELECT 1 FROM job_stats LIMIT 1').fetchone() is None:
+                self._apply_stat_deltas(connection, stat_deltas(self._stat_rows(
+                    connection, 'SELECT job_id, relevancy_score, interpret_relevancy_score, missing_data FROM relevancy_scores', ()
+                )))
+
+    def _stat_rows(self, connection, sql, params):
+        return (
+            {'job_id': job_id, 'relevancy_score': relevancy_score,
+             'interpret_relevancy_score': interpret_relevancy_score, 'missing_data': json.loads(missing_data)}
+            for job_id, relevancy_score, interpret_relevancy_score, missing_data in connection.execute(sql, params)
+        )
+
+    def _apply_stat_deltas(self, connection, deltas):
+        connection.executemany(
+            'INSERT INTO job_stats VALUES (?, ?, ?, ?, ?) ON CONFLICT (job_id, kind, name) '
+            'DO UPDATE SET count = count + excluded.count, total = total + excluded.total',
+            [(job_id, kind, name, count, total) for (job_id, kind, name), (count, total) in deltas.items()]
+        )
+
+    def save_jobs(self, jobs):
+        if not jobs:
+            return
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO job_descriptions VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (job['job_id'], job['job_title'], job['job_description'])
+                    + tuple(json.dumps(job[field]) for field in JOB_LIST_FIELDS)
+                    for job in jobs
+                ]
+            )
+
+    def _job_from_row(self, row):
+        job_id, job_title, job_description, *lists = row
+        job = {'job_id': job_id, 'job_title': job_title, 'job_description': job_description}
+        job.update((field, json.loads(value)) for field, value in zip(JOB_LIST_FIELDS, lists))
+        return job
+
+    def load_jobs(self):
+        rows = self._connection().execute('SELECT * FROM job_descriptions ORDER BY rowid').fetchall()
+        return {row[0]: self._job_from_row(row) for row in rows}
+
+    def load_job(self, job_id):
+        row = self._connection().execute('SELECT * FROM job_descriptions WHERE job_id = ?', (job_id,)).fetchone()
+        return self._job_from_row(row) if row else None
+
+    def save_scores(self, records):
+        if not records:
+            return
+        # The last record wins for a resume_id written twice in one batch
+        records = list({record['resume_id']: record for record in records}.values())
+        with self._connection() as connection:
+            # Take the write lock before reading the rows being replaced, so their
+            # contribution is subtracted from job_stats exactly once
+            connection.execute('BEGIN IMMEDIATE')
+            replaced = []
+            resume_ids = [record['resume_id'] for record in records]
+            for offset in range(0, len(resume_ids), SQLITE_IN_CHUNK):
+                chunk = resume_ids[offset:offset + SQLITE_IN_CHUNK]
+                replaced.extend(self._stat_rows(
+                    connection,
+                    'SELECT job_id, relevancy_score, interpret_relevancy_score, missing_data FROM relevancy_scores '
+                    f"WHERE resume_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ))
+            deltas = stat_deltas(records)
+            for key, (count, total) in stat_deltas(replaced, sign=-1).items():
+                deltas[key][0] += count
+                deltas[key][1] += total
+            self._apply_stat_deltas(connection, deltas)
+            connection.executemany(
+                'INSERT OR REPLACE INTO relevancy_scores VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        record['resume_id'],
+                        record['job_id'],
+                        record['relevancy_score'],
+                        record['interpret_relevancy_score'],
+                        json.dumps(record['extracted_data']),
+                        json.dumps(record['missing_data'])
+                    )
+                    for record in records
+                ]
+            )
+
+    def update_scores(self, records):
+        # Rows are keyed by resume_id, so INSERT OR REPLACE already overwrites (and save_scores
+        # subtracts the replaced rows from job_stats)
+        self.save_scores(records)
+
+    def count_scores(self, job_id):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM relevancy_scores WHERE job_id = ?', (job_id,)
+        ).fetchone()[0]
+
+    def _score_rows(self, sql, params):
+        return [
+            {
+                'resume_id': resume_id,
+                'job_id': job_id,
+                'relevancy_score': relevancy_score,
+                'interpret_relevancy_score': interpret_relevancy_score,
+                'extracted_data': json.loads(extracted_data),
+                'missing_data': json.loads(missing_data)
+            }
+            for resume_id, job_id, relevancy_score, interpret_relevancy_score, extracted_data, missing_data
+            in self._connection().execute(sql, params)
+        ]
+
+    def scores_page(self, job_id, page=1, per_page=50):
+        """One page of a job's score records, highest score first."""
+        return self._score_rows(
+            'SELECT * FROM relevancy_scores WHERE job_id = ? ORDER BY relevancy_score DESC LIMIT ? OFFSET ?',
+            (job_id, *_page_bounds(page, per_page))
+        )
+
+    def load_scores(self, job_id=None):
+        if job_id is None:
+            return self._score_rows('SELECT * FROM relevancy_scores', ())
+        return self._score_rows('SELECT * FROM relevancy_scores WHERE job_id = ?', (job_id,))
+
+    def job_stats(self, job_id, top=TOP_MISSING):
+        """Score histogram, interpret_score buckets and most-missing requirements from the job's counters."""
+        rows = self._connection().execute('SELECT kind, name, count, total FROM job_stats WHERE job_id = ?', (job_id,))
+        return stats_from_counts(job_id, {(kind, name): (count, total) for kind, name, count, total in rows}, top)
+
+    def job_summaries(self):
+        """{job_id: score count, mean and interpret_score buckets} for every job with scores."""
+        counts = {}
+        for job_id, kind, name, count, total in self._connection().execute(
+                "SELECT job_id, kind, name, count, total FROM job_stats WHERE kind IN ('total', 'label')"):
+            counts.setdefault(job_id, {})[(kind, name)] = (count, total)
+        return {job_id: summary_from_counts(job_counts) for job_id, job_counts in counts.items()}
+
+    def is_empty(self):
+        connection = self._connection()
+        return (connection.execute('SELECT 1 FROM job_descriptions LIMIT 1').fetchone() is None
+                and connection.execute('SELECT 1 FROM relevancy_scores LIMIT 1').fetchone() is None)
+
+class MongoRepository:
+    """MongoDB backend; all instances share the process-wide pooled client."""
+
+    name = 'mongo'
+
+    SCORE_PROJECTION = {'_id': 0, 'timestamp': 0}
+    SCORE_INDEX = [('job_id', 1), ('relevancy_score', -1)]
+
+    def __init__(self, summary_ttl=MONGO_SUMMARY_TTL):
+        self.summary_ttl = summary_ttl
+        self._indexed = False
+        self._index_lock = threading.Lock()
+        self._summaries = None  # (monotonic time, job_summaries result)
+
+    def _db(self):
+        """The shared database, with ensure_indexes run the first time this process uses it."""
+        db = get_mongo_db()
+        if not self._indexed:
+            with self._index_lock:
+                if not self._indexed:
+                    self.ensure_indexes(db)
+                    self._indexed = True
+        return db
+
+    def save_jobs(self, jobs):
+        if not jobs:
+            return
+        self._db().job_descriptions.bulk_write(
+            [UpdateOne({'job_id': job['job_id']}, {'$set': job}, upsert=True) for job in jobs],
+            ordered=False
+        )
+
+    def load_jobs(self):
+        return {job['job_id']: job for job in self._db().job_descriptions.find({}, {'_id': 0})}
+
+    def load_job(self, job_id):
+        return self._db().job_descriptions.find_one({'job_id': job_id}, {'_id': 0})
+
+    def save_scores(self, records):
+        self._db()
+        save_relevancy_scores_mongodb(records)
+        self._summaries = None
+
+    def update_scores(self, records):
+        self._db()  # the re-score upserts match on resume_id, so its index must exist first
+        update_relevancy_scores_mongodb(records)
+        self._summaries = None
+
+    def count_scores(self, job_id):
+        return self._db().relevancy_scores.count_documents({'job_id': job_id})
+
+    def scores_page(self, job_id, page=1, per_page=50):
+        limit, skip = _page_bounds(page, per_page)
+        cursor = self._db().relevancy_scores.find({'job_id': job_id}, self.SCORE_PROJECTION)
+        return list(cursor.sort('relevancy_score', -1).skip(skip).limit(limit))
+
+    def load_scores(self, job_id=None):
+        query = {'job_id': job_id} if job_id else {}
+        return list(self._db().relevancy_scores.find(query, self.SCORE_PROJECTION))
+
+    def job_stats(self, job_id, top=TOP_MISSING):
+        """
+        Score histogram, interpret_score buckets and most-missing requirements in one aggregation.
+        The $match is hinted to the (job_id, relevancy_score) index that ensure_indexes creates,
+        so only the job's documents are read, and the $project keeps only the fields the facets
+        read, so extracted_data is dropped before any grouping.
+        """
+        projection = {'_id': 0, 'relevancy_score': 1, 'interpret_relevancy_score': 1}
+        projection.update({section: {'$setUnion': [{'$ifNull': [f'$missing_data.{section}', []]}]}
+                           for section in MISSING_SECTIONS})
+        facets = {
+            'total': [{'$group': {'_id': '', 'count': {'$sum': 1}, 'total': {'$sum': '$relevancy_score'}}}],
+            # Clamped to the first and last bin like analytics.score_bin; cosine scores can be negative
+            'bin': [{'$group': {
+                '_id': {'$max': [{'$min': [{'$floor': {'$divide': ['$relevancy_score', SCORE_BIN_WIDTH]}}, SCORE_BINS - 1]}, 0]},
+                'count': {'$sum': 1}
+            }}],
+            'label': [{'$group': {'_id': '$interpret_relevancy_score', 'count': {'$sum': 1}}}]
+        }
+        for section in MISSING_SECTIONS:
+            facets[f'missing_{section}'] = [
+                {'$unwind': f'${section}'},
+                {'$group': {'_id': f'${section}', 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1, '_id': 1}},
+                {'$limit': top}
+            ]
+        result = next(self._db().relevancy_scores.aggregate(
+            [{'$match': {'job_id': job_id}}, {'$project': projection}, {'$facet': facets}],
+            hint=self.SCORE_INDEX
+        ))
+        counts = {}
+        for kind, groups in result.items():
+            for group in groups:
+                name = str(int(group['_id'])) if kind == 'bin' else group['_id']
+                counts[(kind, name)] = (group['count'], group.get('total', 0.0))
+        return stats_from_counts(job_id, counts, top)
+
+    def job_summaries(self):
+        """
+        Mongo keeps no per-job counters, so this groups every score document; the result is
+        reused for summary_ttl seconds, or until this process writes scores.
+        """
+        cached = self._summaries
+        if cached is not None and time.monotonic() - cached[0] < self.summary_ttl:
+            return cached[1]
+        computed_at = time.monotonic()
+        counts = {}
+        for group in self._db().relevancy_scores.aggregate([
+            {'$project': {'_id': 0, 'job_id': 1, 'relevancy_score': 1, 'interpret_relevancy_score': 1}},
+            {'$group': {'_id': {'job_id': '$job_id', 'label': '$interpret_relevancy_score'},
+                        'count': {'$sum': 1}, 'total': {'$sum': '$relevancy_score'}}}
+        ]):
+            job_counts = counts.setdefault(group['_id']['job_id'], {})
+            job_count, job_total = job_counts.get(('total', ''), (0, 0.0))
+            job_counts[('total', '')] = (job_count + group['count'], job_total + group['total'])
+            job_counts[('label', group['_id']['label'])] = (group['count'], group['total'])
+        summaries = {job_id: summary_from_counts(job_counts) for job_id, job_counts in counts.items()}
+        self._summaries = (computed_at, summaries)
+        return summaries
+
+    def ensure_indexes(self, db=None):
+        """Create the indexes the queries above rely on; create_index is a no-op for existing ones."""
+        db = db if db is not None else get_mongo_db()
+        db.job_descriptions.create_index('job_id', unique=True)
+        db.relevancy_scores.create_index(self.SCORE_INDEX)
+        db.relevancy_scores.create_index('resume_id')  # serves the re-score upserts in update_scores
+
+class CSVRepository:
+    """The original flat files; every read scans the whole file, so use it as a mirror."""
+
+    name = 'csv'
+
+    def __init__(self, jobs_file=JOB_DESCRIPTIONS_FILE, scores_file=RELEVANCY_SCORES_FILE):
+        self.jobs_file = jobs_file
+        self.scores_file = scores_file
+
+    def save_jobs(self, jobs):
+        save_job_descriptions_csv(self.jobs_file, jobs)
+
+    def load_jobs(self):
+        return load_job_descriptions_csv(self.jobs_file)
+
+    def load_job(self, job_id):
+        return self.load_jobs().get(job_id)
+
+    def save_scores(self, records):
+        save_relevancy_scores_csv(self.scores_file, records)
+
+    def update_scores(self, records):
+        update_relevancy_scores_csv(self.scores_file, records)
+
+    def load_scores(self, job_id=None):
+        return [
+            csv_score_record(resume_id, score_data)
+            for resume_id, score_data in load_relevancy_scores_csv(self.scores_file).items()
+            if job_id is None or score_data['job_id'] == job_id
+        ]
+
+    def count_scores(self, job_id):
+        return len(self.load_scores(job_id))
+
+    def scores_page(self, job_id, page=1, per_page=50):
+        limit, skip = _page_bounds(page, per_page)
+        records = sorted(self.load_scores(job_id), key=lambda record: record['relevancy_score'], reverse=True)
+        return records[skip:skip + limit]
+
+    def job_stats(self, job_id, top=TOP_MISSING):
+        return stats_from_records(job_id, self.load_scores(job_id), top)
+
+    def job_summaries(self):
+        records_by_job = {}
+        for record in self.load_scores():
+            records_by_job.setdefault(record['job_id'], []).append(record)
+        return {job_id: summary_from_counts(record_counts(records)) for job_id, records in records_by_job.items()}
+
+class MultiRepository:
+    """Reads from the primary backend and writes to every configured backend."""
+
+    def __init__(self, backends):
+        self.backends = backends
+        self.primary = backends[0]
+        self.name = ','.join(backend.name for backend in backends)
+
+    def save_jobs(self, jobs):
+        for backend in self.backends:
+            with timed(f'save_jobs_{backend.name}'):
+                backend.save_jobs(jobs)
+
+    def save_job(self, job):
+        self.save_jobs([job])
+
+    def save_scores(self, records):
+        for backend in self.backends:
+            with timed(f'save_scores_{backend.name}'):
+                backend.save_scores(records)
+
+    def save_score(self, record):
+        self.save_scores([record])
+
+    def update_scores(self, records):
+        for backend in self.backends:
+            with timed(f'update_scores_{backend.name}'):
+                backend.update_scores(records)
+
+    def load_jobs(self):
+        return self.primary.load_jobs()
+
+    def load_job(self, job_id):
+        return self.primary.load_job(job_id)
+
+    def count_scores(self, job_id):
+        return self.primary.count_scores(job_id)
+
+    def scores_page(self, job_id, page=1, per_page=50):
+        return self.primary.scores_page(job_id, page=page, per_page=per_page)
+
+    def load_scores(self, job_id=None):
+        return self.primary.load_scores(job_id)
+
+    def job_stats(self, job_id, top=TOP_MISSING):
+        return self.primary.job_stats(job_id, top=top)
+
+    def job_summaries(self):
+        return self.primary.job_summaries()
+
+BACKENDS = {
+    'sqlite': SQLiteRepository,
+    'mongo': MongoRepository,
+    'csv': CSVRepository
+}
+
+def create_repository(backends=STORAGE_BACKENDS):
+    """Build a repository from a comma-separated backend list such as "sqlite,mongo"."""
+    names = [name.strip() for name in backends.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if not names or unknown:
+        raise ValueError(f"Unknown storage backends {unknown or backends!r}; choose from {sorted(BACKENDS)}")
+    return MultiRepository([BACKENDS[name]() for name in names])
+
+def seed_from_csv(repository, jobs_file=JOB_DESCRIPTIONS_FILE, scores_file=RELEVANCY_SCORES_FILE):
+    """
+    Load the bundled CSV data into an empty SQLite primary backend; returns whether it did.
+    Safe to run from several processes at once, since both saves replace rows by key.
+    """
+    primary = repository.primary
+    if not isinstance(primary, SQLiteRepository) or not primary.is_empty():
+        return False
+    source = CSVRepository(jobs_file, scores_file)
+    primary.save_jobs(list(source.load_jobs().values()))
+    primary.save_scores(source.load_scores())
+    return True
+
+repository = create_repository()
@@ -0,0 +1,172 @@
+import fcntl
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+SCORING_WORKERS = int(os.getenv('SCORING_WORKERS', '2'))
+SCORING_QUEUE_SIZE = int(os.getenv('SCORING_QUEUE_SIZE', '32'))
+TASKS_DIR = os.getenv('TASKS_DIR', 'data/tasks')
+TASK_RETENTION = float(os.getenv('TASK_RETENTION', '3600'))  # seconds a finished task stays pollable
+SLOT_POLL_INTERVAL = 0.05  # seconds between attempts to take a free scoring slot
+SWEEP_INTERVAL = 60.0  # seconds between scans for expired task files
+
+class QueueFull(Exception):
+    """Raised when the scoring queue has no room for another task."""
+
+class TaskQueue:
+    """
+    Bounded in-process queue drained by a fixed pool of worker threads.
+    A small worker count keeps the CPU-heavy models from being oversubscribed, and the
+    bounded queue pushes back on clients (QueueFull) instead of growing without limit.
+
+    Task state is kept in one JSON file per task under directory, so any gunicorn worker
+    can answer a status poll for a task another worker accepted. Running a task takes one
+    of `workers` flock'd slot files there, which bounds the tasks running at once across
+    every process sharing the directory, not per process. The queue bound is per process.
+    """
+
+    def __init__(self, workers=SCORING_WORKERS, max_queued=SCORING_QUEUE_SIZE, directory=TASKS_DIR,
+                 retention=TASK_RETENTION):
+        self.workers = workers
+        self.directory = directory
+        self.retention = retention
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._tasks = {}  # this process's queued and running tasks
+        self._lock = threading.Lock()
+        self._threads = []
+        self._swept_at = 0.0
+
+    def _start(self):
+        # Threads are started on first use so a forking server starts them in each worker
+        with self._lock:
+            if self._threads:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'scoring-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _path(self, task_id):
+        return os.path.join(self.directory, f"{task_id}.json")
+
+    def _save(self, task):
+        path = self._path(task['task_id'])
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(task, f)
+        os.replace(path + '.tmp', path)
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) and return its task id, or raise QueueFull."""
+        self._start()
+        task_id = uuid.uuid4().hex
+        task = {'task_id': task_id, 'status': 'queued', 'submitted_at': time.time(), 'pid': os.getpid()}
+        # Saved before it is queued, so a worker can't mark it running first
+        self._save(task)
+        with self._lock:
+            self._tasks[task_id] = task
+        try:
+            self._queue.put_nowait((task, func, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                del self._tasks[task_id]
+            os.remove(self._path(task_id))
+            raise QueueFull(f"{self._queue.maxsize} tasks already queued")
+        return task_id
+
+    def _acquire_slot(self):
+        """Block until one of the shared slot files is ours; returns its fd, which holds the flock."""
+        while True:
+            for index in range(self.workers):
+                fd = os.open(os.path.join(self.directory, f"slot-{index}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except BlockingIOError:
+                    os.close(fd)
+            time.sleep(SLOT_POLL_INTERVAL)
+
+    def _work(self):
+        while True:
+            task, func, args, kwargs = self._queue.get()
+            slot = self._acquire_slot()
+            try:
+                task['status'] = 'running'
+                task['started_at'] = time.time()
+                self._save(task)
+                task['result'] = func(*args, **kwargs)
+                task['status'] = 'done'
+            except Exception as e:
+                task['error'] = str(e)
+                task['status'] = 'failed'
+            finally:
+                os.close(slot)  # also releases the flock
+            task['finished_at'] = time.time()
+            try:
+                self._save(task)
+            except (TypeError, ValueError) as e:
+                # A result that can't be stored as JSON
+                task.pop('result', None)
+                task.update(status='failed', error=f"could not store the task result: {e}")
+                self._save(task)
+            with self._lock:
+                del self._tasks[task['task_id']]
+            self._sweep()
+            self._queue.task_done()
+
+    def _sweep(self):
+        """Delete the files of tasks that finished more than retention seconds ago."""
+        now = time.time()
+        if now - self._swept_at < SWEEP_INTERVAL:
+            return
+        self._swept_at = now
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) < self.retention:
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    finished = json.load(f)['status'] in ('done', 'failed')
+                if finished:
+                    os.remove(path)
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def status(self, task_id):
+        """The task's state as last saved by whichever process runs it, or None for unknown (or expired) tasks."""
+        if not task_id.isalnum():
+            return None
+        try:
+            with open(self._path(task_id), 'r', encoding='utf-8') as f:
+                task = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if task['status'] in ('queued', 'running') and not _pid_alive(task['pid']):
+            task.update(status='failed', error='the worker process exited before the task finished')
+        return task
+
+    def stats(self):
+        with self._lock:
+            statuses = [task['status'] for task in self._tasks.values()]
+        return {
+            'workers': self.workers,
+            'queued': statuses.count('queued'),
+            'running': statuses.count('running'),
+            'capacity': self._queue.maxsize
+        }
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+scoring_queue = TaskQueue()
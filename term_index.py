@@ -0,0 +1,223 @@
+"""
+Canonical ids for skills, degrees and fields of study, so requirement gaps are bitset operations.
+
+Every known term (SKILLS_LIST, DEGREE_TYPES, FIELDS_OF_STUDY and the aliases below) is
+normalized and mapped to a concept id; "scikit learn", "Scikit-learn" and "sklearn" share one.
+Each job section numbers the concepts its requirements mention from bit 0, so a resume section
+becomes a small int and the requirements it misses are those with `required & ~resume != 0`.
+"""
+import threading
+from functools import lru_cache
+
+from extractor import SKILLS_LIST, DEGREE_TYPES, FIELDS_OF_STUDY
+from patterns import POSSESSIVE_RE, TERM_SEPARATOR_RE
+
+# canonical name: other spellings of the same skill
+SKILL_ALIASES = {
+    'Scikit-learn': ['sklearn', 'scikit'],
+    'JavaScript': ['JS'],
+    'TypeScript': ['TS'],
+    'Go': ['Golang'],
+    'Natural Language Processing': ['NLP'],
+    'Artificial Intelligence': ['AI'],
+    'Machine Learning': ['ML'],
+    'Node.js': ['NodeJS', 'Node'],
+    'Vue.js': ['Vue', 'VueJS'],
+    'Express.js': ['Express', 'ExpressJS'],
+    'React': ['React.js', 'ReactJS'],
+    'AWS': ['Amazon Web Services'],
+    'Azure': ['Microsoft Azure'],
+    'Google Cloud': ['GCP', 'Google Cloud Platform'],
+    'PostgreSQL': ['Postgres'],
+    'Kubernetes': ['K8s'],
+    'CI/CD': ['CICD', 'Continuous Integration'],
+    'RESTful API': ['REST API', 'RESTful APIs', 'REST APIs', 'REST'],
+    'UI/UX': ['UX/UI', 'UX', 'UI'],
+    'Communication': ['Communication Skills'],
+    'Big Data': ['Big Data Technologies'],
+    'Data Visualization': ['Data Visualisation'],
+    'Neural Networks': ['Neural Network'],
+    'Elasticsearch': ['Elastic Search'],
+    'Shell': ['Bash', 'Shell Scripting']
+}
+
+# Degree groups: canonical name -> (concepts it implies, other spellings). Matching a group also
+# matches its level, so "B.Sc." covers a requirement for a "Bachelor" but not the reverse.
+DEGREE_GROUPS = {
+    'Bachelor of Science': (['Bachelor'], ['BSc', 'B.Sc.', 'BS', 'B.S.']),
+    'Bachelor of Arts': (['Bachelor'], ['BA', 'B.A.']),
+    'Bachelor of Engineering': (['Bachelor', 'Engineering'], ['B.E.', 'BEng', 'B.Eng.']),
+    'Bachelor of Technology': (['Bachelor', 'Engineering'], ['B.Tech', 'BTech', 'B.Tech.']),
+    'Bachelor of Business Administration': (['Bachelor', 'Business'], ['BBA', 'B.B.A.']),
+    'Master of Science': (['Master'], ['MSc', 'M.Sc.', 'MS', 'M.S.']),
+    'Master of Arts': (['Master'], ['MA', 'M.A.']),
+    'Master of Engineering': (['Master', 'Engineering'], ['M.E.', 'MEng', 'M.Eng.']),
+    'Master of Technology': (['Master', 'Engineering'], ['M.Tech', 'MTech', 'M.Tech.']),
+    'Master of Business Administration': (['Master', 'Business'], ['MBA', 'M.B.A.']),
+    'Doctorate': ([], ['Ph.D.', 'PhD', 'Doctoral', 'Doctor of Philosophy']),
+    'Postdoctoral': ([], ['Postdoc']),
+    'Associate': ([], ['A.A.', 'A.S.', 'A.A.S.']),
+    'Certificate': ([], ['Certification'])
+}
+
+FIELD_ALIASES = {
+    'Computer Science': ['CS', 'CSE'],
+    'Information Technology': ['IT'],
+    'Human Resources': ['HR'],
+    'Mathematics': ['Math', 'Maths'],
+    'Statistics': ['Stats']
+}
+
+# Sections matched by the concepts they mention; the others by their whole normalized text
+CONCEPT_SECTIONS = ('skills', 'education')
+MAX_PHRASE_WORDS = 6  # longer requirement phrases only match a resume item with the same text
+
+def normalize_term(text):
+    """Lowercase, drop possessives and collapse separators: "Bachelor’s  Degree" -> "bachelor degree"."""
+    text = POSSESSIVE_RE.sub('', text.lower())
+    return ' '.join(word for word in (word.strip('.') for word in TERM_SEPARATOR_RE.split(text)) if word)
+
+class TermIndex:
+    """
+    Normalized phrase -> concept id, built once from the vocabulary lists.
+
+    Job requirements that mention no known concept are interned as new phrases (under a
+    lock, as this only happens when a job is first scored); resume items are only looked
+    up, so the index stays bounded by the vocabulary plus the jobs' requirements.
+    """
+
+    def __init__(self):
+        self._ids = {}        # normalized phrase -> concept id
+        self._implied = []    # concept id -> (itself, concepts it implies...)
+        self._names = []      # concept id -> canonical name
+        self._max_words = 1
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_vocabulary(cls):
+        index = cls()
+        # Aliases first, so a list entry that is an alias (e.g. "NLP") joins its canonical concept
+        for canonical, (implies, aliases) in DEGREE_GROUPS.items():
+            index.add(canonical, aliases, implies)
+        for aliases_by_name in (SKILL_ALIASES, FIELD_ALIASES):
+            for canonical, aliases in aliases_by_name.items():
+                index.add(canonical, aliases)
+        for term in DEGREE_TYPES + SKILLS_LIST + FIELDS_OF_STUDY:
+            index.add(term)
+        return index
+
+    def add(self, canonical, aliases=(), implies=()):
+        """Register a concept under its canonical name and aliases; returns its id."""
+        with self._lock:
+            return self._add(canonical, aliases, implies)
+
+    def _add(self, canonical, aliases=(), implies=()):
+        concept_id = self._ids.get(normalize_term(canonical))
+        if concept_id is None:
+            concept_id = len(self._names)
+            self._names.append(canonical)
+            self._implied.append((concept_id,))
+        for phrase in [canonical, *aliases]:
+            phrase = normalize_term(phrase)
+            self._ids.setdefault(phrase, concept_id)
+            self._max_words = max(self._max_words, min(phrase.count(' ') + 1, MAX_PHRASE_WORDS))
+        for term in implies:
+            implied = self._implied[self._add(term)]
+            self._implied[concept_id] += tuple(i for i in implied if i not in self._implied[concept_id])
+        return concept_id
+
+    def concepts(self, text, intern=False):
+        """Ids of every concept mentioned in text, matching the longest known phrase first."""
+        phrase = normalize_term(text)
+        concept_id = self._ids.get(phrase)
+        if concept_id is not None:
+            return self._implied[concept_id]
+        words = phrase.split(' ')
+        found, start = [], 0
+        while start < len(words):
+            for length in range(min(self._max_words, len(words) - start), 0, -1):
+                concept_id = self._ids.get(' '.join(words[start:start + length]))
+                if concept_id is not None:
+                    found.extend(self._implied[concept_id])
+                    start += length
+                    break
+            else:
+                start += 1
+        if not found and phrase and intern:
+            return (self.add(text),)
+        return tuple(dict.fromkeys(found))
+
+    def phrase(self, text, intern=False):
+        """Id of the whole normalized text, for sections compared item by item."""
+        concept_id = self._ids.get(normalize_term(text))
+        if concept_id is None:
+            if not normalize_term(text) or not intern:
+                return ()
+            concept_id = self.add(text)
+        return (concept_id,)
+
+    def lookup(self, key, text, intern=False):
+        if key in CONCEPT_SECTIONS:
+            return self.concepts(text, intern)
+        return self.phrase(text, intern)
+
+    def __len__(self):
+        return len(self._names)
+
+term_index = TermIndex.from_vocabulary()
+
+# text -> concept ids of resume items, per section; cleared when it grows past the limit
+# or when a job's requirements add new phrases that earlier lookups could not see
+ITEM_CACHE_SIZE = 65536
+_item_concepts = {key: {} for key in ('skills', 'education', 'experience')}
+
+class SectionRequirements:
+    """One job section's requirements, with the concepts they mention numbered from bit 0."""
+
+    def __init__(self, key, requirements):
+        self.key = key
+        self.bits = {}      # concept id -> local bit
+        self.masks = []     # [(requirement, mask of local bits), ...] in job order
+        seen = set()
+        for requirement in requirements:
+            normalized = normalize_term(requirement)
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            mask = 0
+            for concept_id in term_index.lookup(key, requirement, intern=True):
+                mask |= self.bits.setdefault(concept_id, 1 << len(self.bits))
+            self.masks.append((requirement, mask))
+        self.required = (1 << len(self.bits)) - 1
+
+    def missing(self, items):
+        cache = _item_concepts.setdefault(self.key, {})
+        have = 0
+        for text in items:
+            concepts = cache.get(text)
+            if concepts is None:
+                if len(cache) >= ITEM_CACHE_SIZE:
+                    cache.clear()
+                concepts = cache[text] = term_index.lookup(self.key, text)
+            for concept_id in concepts:
+                have |= self.bits.get(concept_id, 0)
+        lacking = self.required & ~have
+        if not lacking:
+            return []
+        return [requirement for requirement, mask in self.masks if mask & lacking]
+
+@lru_cache(maxsize=1024)
+def section_requirements(key, requirements):
+    """SectionRequirements for one section of a job, compiled once per distinct requirement list."""
+    size = len(term_index)
+    compiled = SectionRequirements(key, requirements)
+    if len(term_index) != size:
+        # New phrases may match resume items looked up before they existed
+        for cache in _item_concepts.values():
+            cache.clear()
+    return compiled
+
+def missing_requirements(extracted_data, required_data):
+    """{section: [requirement, ...]} for the requirements whose concepts the resume doesn't cover, in job order."""
+    return {key: section_requirements(key, tuple(requirements)).missing(extracted_data.get(key, []))
+            for key, requirements in required_data.items()}
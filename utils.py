@@ -1,22 +1,32 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from dotenv import load_dotenv
 import os
 import csv
-import os
 import datetime
+import threading
+
+from csv_writer import get_csv_writer
+from term_index import missing_requirements
 
 load_dotenv()
 
-MONGO_URI = "mongodb+srv://<username>:<password>@cluster.yn4nj.mongodb.net/resume_analyzer?retryWrites=true&w=majority"
-client = MongoClient(MONGO_URI)
-db = client.get_database()
+MONGO_URI = os.getenv("MONGO_URI", "mongodb+srv://<username>:<password>@cluster.yn4nj.mongodb.net/resume_analyzer?retryWrites=true&w=majority")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
 
-job_collection = db.job_descriptions
-resume_collection = db.resumes
-scores_collection = db.relevancy_scores
+_mongo_client = None
+_mongo_client_lock = threading.Lock()
 
-import csv
-import os
+def get_mongo_client():
+    """Return the process-wide MongoClient, created on first use and shared by all callers."""
+    global _mongo_client
+    if _mongo_client is None:
+        with _mongo_client_lock:
+            if _mongo_client is None:
+                _mongo_client = MongoClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE)
+    return _mongo_client
+
+def get_mongo_db():
+    return get_mongo_client().get_database()
 
 def load_job_descriptions_csv(filename):
     """Load job descriptions from a CSV file into a dictionary."""
@@ -36,26 +46,31 @@ def load_job_descriptions_csv(filename):
                 }
     return job_descriptions
 
+JOB_DESCRIPTION_FIELDS = ['job_id', 'job_title', 'job_description', 'required_skills', 'required_education', 'required_experience']
+
+def job_description_csv_row(job_data):
+    """Flatten a job description into a CSV row."""
+    return {
+        'job_id': job_data['job_id'],
+        'job_title': job_data['job_title'],
+        'job_description': job_data['job_description'],
+        'required_skills': ','.join(job_data['required_skills']),
+        'required_education': ','.join(job_data['required_education']),
+        'required_experience': ','.join(job_data['required_experience'])
+    }
+
 def save_job_description_csv(filename, job_data):
     """Save a new job description to the CSV file."""
-    file_exists = os.path.exists(filename)
-    with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['job_id', 'job_title', 'job_description', 'required_skills', 'required_education', 'required_experience']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow({
-            'job_id': job_data['job_id'],
-            'job_title': job_data['job_title'],
-            'job_description': job_data['job_description'],
-            'required_skills': ','.join(job_data['required_skills']),
-            'required_education': ','.join(job_data['required_education']),
-            'required_experience': ','.join(job_data['required_experience'])
-        })
+    save_job_descriptions_csv(filename, [job_data])
+
+def save_job_descriptions_csv(filename, jobs):
+    """Append many job descriptions to the CSV file through its shared writer."""
+    if jobs:
+        get_csv_writer(filename, JOB_DESCRIPTION_FIELDS).write_rows(job_description_csv_row(job) for job in jobs)
 
 def save_job_description_mongodb(job_data):
     """Save job description to MongoDB"""
-    job_collection.update_one(
+    get_mongo_db().job_descriptions.update_one(
         {'job_id': job_data['job_id']},
         {'$set': job_data},
         upsert=True
@@ -63,32 +78,78 @@ def save_job_description_mongodb(job_data):
 
 def load_job_descriptions_mongodb():
     """Load job descriptions from MongoDB"""
-    return {job['job_id']: job for job in job_collection.find()}
+    return {job['job_id']: job for job in get_mongo_db().job_descriptions.find()}
+
+def load_job_description_mongodb(job_id):
+    """Load a single job description from MongoDB"""
+    return get_mongo_db().job_descriptions.find_one({'job_id': job_id})
+
+RELEVANCY_SCORE_FIELDS = [
+    'resume_id', 'job_id', 'relevancy_score', 'interpret_relevancy_score',
+    'extracted_skills', 'extracted_education', 'extracted_experience',
+    'missing_skills', 'missing_education', 'missing_experience'
+]
+
+def relevancy_score_csv_row(resume_id, job_id, relevancy_score, interpret_relevancy_score, extracted_data, missing_data):
+    """Flatten a relevancy score record into a CSV row."""
+    return {
+        'resume_id': resume_id,
+        'job_id': job_id,
+        'relevancy_score': relevancy_score,
+        'interpret_relevancy_score': interpret_relevancy_score,
+        'extracted_skills': ','.join(extracted_data.get('skills', [])),
+        'extracted_education': ','.join(extracted_data.get('education', [])),
+        'extracted_experience': ','.join(extracted_data.get('experience', [])),
+        'missing_skills': ','.join(missing_data.get('skills', [])),
+        'missing_education': ','.join(missing_data.get('education', [])),
+        'missing_experience': ','.join(missing_data.get('experience', []))
+    }
 
 def save_relevancy_score_csv(filename, resume_id, job_id, relevancy_score, interpret_relevancy_score, extracted_data, missing_data):
     """Save the relevancy score along with extracted and missing data to the CSV file."""
-    file_exists = os.path.exists(filename)
-    with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'resume_id', 'job_id', 'relevancy_score', 'interpret_relevancy_score',
-            'extracted_skills', 'extracted_education', 'extracted_experience',
-            'missing_skills', 'missing_education', 'missing_experience'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow({
-            'resume_id': resume_id,
-            'job_id': job_id,
-            'relevancy_score': relevancy_score,
-            'interpret_relevancy_score': interpret_relevancy_score,
-            'extracted_skills': ','.join(extracted_data.get('skills', [])),
-            'extracted_education': ','.join(extracted_data.get('education', [])),
-            'extracted_experience': ','.join(extracted_data.get('experience', [])),
-            'missing_skills': ','.join(missing_data.get('skills', [])),
-            'missing_education': ','.join(missing_data.get('education', [])),
-            'missing_experience': ','.join(missing_data.get('experience', []))
-        })
+    save_relevancy_scores_csv(filename, [{
+        'resume_id': resume_id,
+        'job_id': job_id,
+        'relevancy_score': relevancy_score,
+        'interpret_relevancy_score': interpret_relevancy_score,
+        'extracted_data': extracted_data,
+        'missing_data': missing_data
+    }])
+
+def save_relevancy_scores_csv(filename, records):
+    """Append many relevancy score records to the CSV file through its shared writer."""
+    if not records:
+        return
+    get_csv_writer(filename, RELEVANCY_SCORE_FIELDS).write_rows(
+        relevancy_score_csv_row(
+            record['resume_id'],
+            record['job_id'],
+            record['relevancy_score'],
+            record['interpret_relevancy_score'],
+            record['extracted_data'],
+            record['missing_data']
+        )
+        for record in records
+    )
+
+def update_relevancy_scores_csv(filename, records):
+    """Replace the CSV rows of already stored records (matched by resume_id) by rewriting the file."""
+    if not records:
+        return
+    get_csv_writer(filename, RELEVANCY_SCORE_FIELDS).replace_rows(
+        (
+            relevancy_score_csv_row(
+                record['resume_id'],
+                record['job_id'],
+                record['relevancy_score'],
+                record['interpret_relevancy_score'],
+                record['extracted_data'],
+                record['missing_data']
+            )
+            for record in records
+        ),
+        key='resume_id'
+    )
 
 def save_relevancy_score_mongodb(resume_id, job_id, relevancy_score, interpret_score, extracted_data, missing_data):
     """Save relevancy score to MongoDB"""
@@ -101,7 +162,28 @@ def save_relevancy_score_mongodb(resume_id, job_id, relevancy_score, interpret_s
         'missing_data': missing_data,
         'timestamp': datetime.datetime.utcnow()
     }
-    scores_collection.insert_one(score_data)
+    get_mongo_db().relevancy_scores.insert_one(score_data)
+
+def save_relevancy_scores_mongodb(records):
+    """Save many relevancy score records to MongoDB with one insert_many"""
+    if not records:
+        return
+    timestamp = datetime.datetime.utcnow()
+    get_mongo_db().relevancy_scores.insert_many(
+        [dict(record, timestamp=timestamp) for record in records],
+        ordered=False
+    )
+
+def update_relevancy_scores_mongodb(records):
+    """Replace existing relevancy score documents (matched by resume_id, which MongoRepository indexes) with one bulk write"""
+    if not records:
+        return
+    timestamp = datetime.datetime.utcnow()
+    get_mongo_db().relevancy_scores.bulk_write(
+        [UpdateOne({'resume_id': record['resume_id']}, {'$set': dict(record, timestamp=timestamp)}, upsert=True)
+         for record in records],
+        ordered=False
+    )
 
 def load_relevancy_scores_csv(filename):
     """Load relevancy scores from a CSV file."""
@@ -129,4 +211,16 @@ def load_relevancy_scores_csv(filename):
 def load_relevancy_scores_mongodb(job_id=None):
     """Load relevancy scores from MongoDB"""
     query = {'job_id': job_id} if job_id else {}
-    return list(scores_collection.find(query))
+    return list(get_mongo_db().relevancy_scores.find(query))
+
+def get_missing_requirements(extracted_data, required_data):
+    """Return the required items that were not found in the extracted data, compared by canonical term."""
+    return missing_requirements(extracted_data, required_data)
+
+def get_required_data(job_description):
+    """Collect a job's requirements under the same keys as the extracted data."""
+    return {
+        'skills': job_description['required_skills'],
+        'education': job_description['required_education'],
+        'experience': job_description['required_experience']
+    }